@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from .generator import LogSpec, generate_lines, players
+
+# Keep the benchmarks away from the real caches
+os.environ.setdefault("CACHE_DB_PATH", os.path.join("benchmarks", ".cache", "cache.sqlite3"))
+from project.parser import LogFile  # noqa: E402
+from project.ingest import LineStream, CHUNK_SIZE  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# Line based checks, each one run on its own over log_file.lines (run_checks does them all in one pass)
+# check_for_pirated_plugins and check_for_malware are both the rules check now
+LINE_CHECKS = [
+    "get_flavor_line", "get_plugins", "check_offline_mode", "check_for_pirated_plugins",
+    "check_for_mising_dependencies", "find_exceptions", "check_for_ambiguous_plugin",
+    "check_for_attempted_downgrade", "check_for_malware", "check_config", "get_players",
+]
+# These work off what the line checks found, so those get run first (untimed)
+DERIVED_CHECKS = ["get_paper_version", "check_for_paper", "check_for_weird_plugins", "check_for_malware_plugins", "check_possibly_cracked"]
+
+
+class BenchLogFile(LogFile):
+    # A LogFile that reads from memory and never touches the network, so we're only timing the parser
+    def __init__(self, body=b"", usernames=None):
+        super().__init__("https://mclo.gs/benchmark", use_result_store=False)
+        self.body = body
+        self.usernames = usernames or {}
+        # We want the whole log parsed however big it is
+        self.max_fetch_lines = None
+        self.max_fetch_bytes = None
+        self.max_body_bytes = None
+
+    def open_log_stream(self):
+        chunks = (self.body[i:i + CHUNK_SIZE] for i in range(0, len(self.body), CHUNK_SIZE))
+        return NullResponse(), LineStream(chunks)
+
+    def get_latest_paper_version(self):
+        return 0
+
+    def lookup_cached_usernames(self, uuids):
+        return {uuid: self.usernames.get(uuid) for uuid in uuids}
+
+
+class NullResponse:
+    # No Content-Length, so it's always streamed
+    headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def prepare(case, log_file):
+    if case in DERIVED_CHECKS:
+        log_file.get_flavor_line()
+        log_file.get_plugins()
+        if case == "check_possibly_cracked":
+            log_file.check_for_weird_plugins()
+    elif case == "get_report_as_string":
+        log_file.run_checks()
+
+
+def run_case(case, lines, body, usernames):
+    log_file = BenchLogFile(body, usernames)
+    log_file.lines = lines
+    prepare(case, log_file)
+    start = time.perf_counter()
+    getattr(log_file, case)()
+    return time.perf_counter() - start
+
+
+def measure_peak(case, lines, body, usernames):
+    # tracemalloc slows everything down a lot, so this is its own run and never timed
+    log_file = BenchLogFile(body, usernames)
+    log_file.lines = lines
+    prepare(case, log_file)
+    tracemalloc.start()
+    try:
+        getattr(log_file, case)()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(size, seed, repeat, memory):
+    spec = LogSpec(lines=size, seed=seed)
+    lines = generate_lines(spec)
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+    usernames = {uuid: name for name, uuid in players(spec)}
+    results = []
+    for case in LINE_CHECKS + DERIVED_CHECKS + ["run_checks", "get_report_as_string"]:
+        seconds = min(run_case(case, lines, body, usernames) for _ in range(repeat))
+        result = {
+            "size": size,
+            "case": case,
+            "seconds": seconds,
+            "lines_per_sec": size / seconds if seconds > 0 else None,
+            "peak_bytes": measure_peak(case, lines, body, usernames) if memory else None,
+        }
+        results.append(result)
+    return results
+
+
+def format_row(result):
+    lines_per_sec = f"{result['lines_per_sec']:,.0f}" if result["lines_per_sec"] else "-"
+    peak = f"{result['peak_bytes'] / 1024:,.0f} KiB" if result["peak_bytes"] is not None else "-"
+    return f"{result['size']:>10,}  {result['case']:<32} {result['seconds'] * 1000:>10.2f} ms  {lines_per_sec:>14}  {peak:>12}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the log parser against synthetic Paper logs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="log sizes in lines, anything from 1000 up to 10000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--output", help="write the results as json here too")
+    args = parser.parse_args()
+
+    print(f"{'lines':>10}  {'case':<32} {'time':>13}  {'lines/sec':>14}  {'peak memory':>12}")
+    results = []
+    for size in args.sizes:
+        for result in bench_size(size, args.seed, args.repeat, not args.no_memory):
+            print(format_row(result))
+            results.append(result)
+        sys.stdout.flush()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "seed": args.seed, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
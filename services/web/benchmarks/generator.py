@@ -0,0 +1,230 @@
+import sys
+import random
+import argparse
+
+# Makes up Paper latest.log files that look like the real thing, the same seed and settings always give the same log
+MC_VERSION = "1.21.4"
+PAPER_BUILD = 211
+NORMAL_LINES = [
+    "[{time}] [Server thread/INFO]: {player} issued server command: /spawn",
+    "[{time}] [Server thread/INFO]: {player} joined the game",
+    "[{time}] [Server thread/INFO]: {player} left the game",
+    "[{time}] [Server thread/INFO]: <{player}> anyone wanna trade diamonds",
+    "[{time}] [Server thread/INFO]: [Essentials] Teleporting {player} to spawn",
+    "[{time}] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2054ms or 41 ticks behind",
+    "[{time}] [Server thread/INFO]: Saving the game (this may take a moment!)",
+    "[{time}] [Server thread/INFO]: Saved the game",
+    "[{time}] [Craft Scheduler Thread - 12 - LuckPerms/INFO]: [LuckPerms] Performing sync",
+    "[{time}] [Server thread/INFO]: {player} lost connection: Disconnected",
+]
+PLUGIN_NAMES = [
+    "LuckPerms", "Essentials", "EssentialsSpawn", "EssentialsChat", "Vault", "WorldEdit", "WorldGuard", "CoreProtect",
+    "ProtocolLib", "ViaVersion", "ViaBackwards", "PlaceholderAPI", "Multiverse-Core", "GriefPrevention", "Citizens",
+    "DiscordSRV", "Dynmap", "mcMMO", "Jobs", "ChestShop", "TAB", "DecentHolograms", "ItemsAdder", "ClearLagg",
+    "SkinsRestorer", "AuthMe", "PlugMan", "Skript", "Shopkeepers", "Towny",
+]
+EXCEPTIONS = [
+    ("java.lang.NullPointerException", "Cannot invoke \"org.bukkit.entity.Player.getName()\" because \"player\" is null"),
+    ("java.lang.IllegalStateException", "Asynchronous chunk load!"),
+    ("java.lang.ArrayIndexOutOfBoundsException", "Index 3 out of bounds for length 3"),
+    ("java.util.ConcurrentModificationException", "null"),
+]
+FRAMES = [
+    "com.example.{plugin}.listener.PlayerListener.onJoin(PlayerListener.java:{line})",
+    "com.example.{plugin}.Main.onEnable(Main.java:{line})",
+    "org.bukkit.plugin.java.JavaPluginLoader$1.execute(JavaPluginLoader.java:{line})",
+    "co.aikar.timings.TimedEventExecutor.execute(TimedEventExecutor.java:{line})",
+    "org.bukkit.plugin.SimplePluginManager.callEvent(SimplePluginManager.java:{line})",
+    "net.minecraft.server.MinecraftServer.tickServer(MinecraftServer.java:{line})",
+    "java.base/java.lang.Thread.run(Thread.java:{line})",
+]
+CONFIG_ERRORS = [
+    ("world-settings, default, entities, spawning, monster-spawn-max-light-level", "java.lang.Integer", "java.lang.String"),
+    ("world-settings, default, chunks, max-auto-save-chunks-per-tick", "java.lang.Integer", "java.lang.Boolean"),
+    ("world-settings, default, collisions, max-entity-collisions", "java.lang.Integer", "java.lang.String"),
+]
+
+
+class LogSpec:
+    # How much of each interesting thing goes into the log, the rest is filler
+    def __init__(self, lines=10000, seed=0, plugins=40, stack_traces=None, player_joins=None, players=None,
+                 pirated=2, malware=1, config_errors=1, ambiguous=1, missing_dependencies=1, downgrades=0,
+                 offline=True, proxy=None):
+        self.lines = lines
+        self.seed = seed
+        self.plugins = plugins
+        # Defaults scale with the log, the same way they do on a real server
+        self.stack_traces = stack_traces if stack_traces is not None else max(lines // 500, 1)
+        self.player_joins = player_joins if player_joins is not None else max(lines // 200, 1)
+        self.players = players if players is not None else max(min(self.player_joins // 4, 500), 1)
+        self.pirated = pirated
+        self.malware = malware
+        self.config_errors = config_errors
+        self.ambiguous = ambiguous
+        self.missing_dependencies = missing_dependencies
+        self.downgrades = downgrades
+        self.offline = offline
+        # None, "BungeeCord" or "Velocity"
+        self.proxy = proxy
+
+
+def format_time(seconds):
+    seconds = int(seconds) % (24 * 60 * 60)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def make_player(rng, index):
+    # The UUID is derived from the name, so players() can tell you who's who
+    uuid = f"{index:08x}-{rng.randrange(16 ** 4):04x}-4{rng.randrange(16 ** 3):03x}-a{rng.randrange(16 ** 3):03x}-{rng.randrange(16 ** 12):012x}"
+    return f"Player{index}", uuid
+
+
+def players(spec):
+    rng = random.Random(f"{spec.seed}-players")
+    return [make_player(rng, i) for i in range(spec.players)]
+
+
+def startup_lines(spec, rng, plugin_names):
+    time = "16:38:57"
+    yield f"[{time}] [ServerMain/INFO]: Environment: Environment[sessionHost=https://sessionserver.mojang.com, servicesHost=https://api.minecraftservices.com, name=PROD]"
+    yield f"[{time}] [ServerMain/INFO]: [bootstrap] Running Java 21 (OpenJDK 64-Bit Server VM 21.0.5+11-LTS; Eclipse Adoptium Temurin-21.0.5+11) on Linux 6.1.0 (amd64)"
+    yield f"[{time}] [ServerMain/INFO]: [bootstrap] Loading Paper {MC_VERSION}-{PAPER_BUILD}-main@12e2a23 (2025-01-20T10:16:34Z) for Minecraft {MC_VERSION}"
+    for _ in range(spec.ambiguous):
+        name = rng.choice(plugin_names)
+        yield (f"[{time}] [Server thread/ERROR]: [ModernPluginLoadingStrategy] Ambiguous plugin name '{name}' for files "
+               f"'plugins/.paper-remapped/{name}-1.0.jar' and 'plugins/.paper-remapped/{name}-1.1.jar' in 'plugins/.paper-remapped'")
+    for _ in range(spec.missing_dependencies):
+        name = rng.choice(plugin_names)
+        yield (f"[{time}] [Server thread/ERROR]: Could not load 'plugins/{name}.jar' in folder 'plugins' "
+               "org.bukkit.plugin.UnknownDependencyException: Unknown/missing dependency plugins: [Vault, ProtocolLib]. Please download and install these plugins to run '" + name + "'.")
+    time = "16:39:01"
+    yield f"[{time}] [Server thread/INFO]: Starting minecraft server version {MC_VERSION}"
+    yield f"[{time}] [Server thread/INFO]: Loading properties"
+    yield (f"[{time}] [Server thread/INFO]: This server is running Paper version {MC_VERSION}-{PAPER_BUILD}-main@12e2a23 "
+           f"(2025-01-20T10:16:34Z) (Implementing API version {MC_VERSION}-R0.1-SNAPSHOT)")
+    yield f"[{time}] [Server thread/INFO]: Server Ping Player Sample Count: 12"
+    yield f"[{time}] [Server thread/INFO]: Using 4 threads for Netty based IO"
+    if spec.offline:
+        yield f"[{time}] [Server thread/WARN]: **** SERVER IS RUNNING IN OFFLINE/INSECURE MODE!"
+        yield f"[{time}] [Server thread/WARN]: The server will make no attempt to authenticate usernames. Beware."
+        if spec.proxy == "BungeeCord":
+            yield f"[{time}] [Server thread/WARN]: Whilst this makes it possible to use BungeeCord, unless access to your server is properly restricted, it also opens up the ability for hackers to connect with any username they choose."
+        elif spec.proxy == "Velocity":
+            yield f"[{time}] [Server thread/WARN]: Whilst this makes it possible to use Velocity, unless access to your server is properly restricted, it also opens up the ability for hackers to connect with any username they choose."
+        yield f"[{time}] [Server thread/WARN]: Please see http://www.spigotmc.org/wiki/firewall-guide/ for further information."
+    for name in plugin_names:
+        yield f"[{time}] [Server thread/INFO]: [{name}] Loading server plugin {name} v{rng.randint(1, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+    yield f"[{time}] [Server thread/INFO]: Server permissions file permissions.yml is empty, ignoring it"
+    yield f"[{time}] [Server thread/INFO]: Preparing level \"world\""
+
+
+def pirated_line(rng, time):
+    name = rng.choice(["LifestealCore", "EliteMobs", "MMOItems", "ModelEngine"])
+    return rng.choice([
+        f"[{time}] [Server thread/INFO]: [{name}] [{name}] [Loader] Leaked by Bob @ BlackSpigot.net",
+        f"[{time}] [Server thread/INFO]: [{name}] \x1b[36m[Spigotunlocked.net] - COSMO",
+        f"[{time}] [Server thread/INFO]: [{name}] Downloaded from directleaks.to",
+        f"[{time}] [Server thread/INFO]: [STDOUT] {name} cracked by nulled.to",
+    ])
+
+
+def stack_trace(rng, time, malware):
+    exception, message = rng.choice(EXCEPTIONS)
+    plugin = rng.choice(PLUGIN_NAMES)
+    lines = [f"[{time}] [Server thread/ERROR]: Could not pass event PlayerJoinEvent to {plugin} v1.0", f"{exception}: {message}"]
+    for frame in rng.sample(FRAMES, rng.randint(3, len(FRAMES))):
+        lines.append("\tat " + frame.format(plugin=plugin, line=rng.randint(20, 900)))
+    if malware:
+        # What the infected Updater class shows up as
+        lines.insert(3, f"\tat Updater.a(:{rng.randint(10, 99)})")
+    if rng.random() < 0.3:
+        lines.append(f"Caused by: {exception}: {message}")
+        lines.append("\tat " + FRAMES[0].format(plugin=plugin, line=rng.randint(20, 900)))
+        lines.append(f"\t... {rng.randint(5, 30)} more")
+    return lines
+
+
+def config_error(rng, time):
+    location, valid_type, invalid_type = rng.choice(CONFIG_ERRORS)
+    return (f"[{time}] [Server thread/ERROR]: org.spongepowered.configurate.serialize.CoercionFailedException: [{location}] "
+            f"of type {valid_type}: Failed to coerce input value of type {invalid_type} to {valid_type}")
+
+
+def generate(spec):
+    # Yields the log a line at a time, so a 10M line log never has to be in memory at once
+    rng = random.Random(spec.seed)
+    plugin_names = [PLUGIN_NAMES[i % len(PLUGIN_NAMES)] + ("" if i < len(PLUGIN_NAMES) else str(i)) for i in range(spec.plugins)]
+    player_list = players(spec)
+    emitted = 0
+    for line in startup_lines(spec, rng, plugin_names):
+        if emitted >= spec.lines:
+            return
+        yield line
+        emitted += 1
+    body_lines = max(spec.lines - emitted, 0)
+    # Spread the interesting bits out over the body, config errors and downgrades happen early on a real server
+    events = []
+    events += ["trace"] * spec.stack_traces
+    events += ["malware"] * spec.malware
+    events += ["join"] * spec.player_joins
+    events += ["pirated"] * spec.pirated
+    events += ["downgrade"] * spec.downgrades
+    events.extend(["config"] * spec.config_errors)
+    events = events[:body_lines]
+    positions = sorted(rng.sample(range(body_lines), len(events)))
+    rng.shuffle(events)
+    scheduled = dict(zip(positions, events))
+    seconds = 16 * 3600 + 39 * 60 + 5
+    pending = []
+    for i in range(body_lines):
+        if i % 40 == 0:
+            seconds += 1
+        time = format_time(seconds)
+        event = scheduled.get(i)
+        if event is not None:
+            if event == "trace" or event == "malware":
+                pending.extend(stack_trace(rng, time, event == "malware"))
+            elif event == "join":
+                name, uuid = rng.choice(player_list)
+                pending.append(f"[{time}] [User Authenticator #{rng.randint(1, 9)}/INFO]: UUID of player {name} is {uuid}")
+            elif event == "pirated":
+                pending.append(pirated_line(rng, time))
+            elif event == "downgrade":
+                pending.append(f"[{time}] [Server thread/ERROR]: java.lang.RuntimeException: Server attempted to load chunk saved with newer version of minecraft! 4189 > 4082")
+            elif event == "config":
+                pending.append(config_error(rng, time))
+        if pending:
+            # Multi line events push filler back rather than getting cut up
+            yield pending.pop(0)
+        else:
+            yield rng.choice(NORMAL_LINES).format(time=time, player=rng.choice(player_list)[0])
+
+
+def generate_lines(spec):
+    return list(generate(spec))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Paper latest.log")
+    parser.add_argument("lines", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plugins", type=int, default=40)
+    parser.add_argument("--stack-traces", type=int)
+    parser.add_argument("--player-joins", type=int)
+    parser.add_argument("--players", type=int)
+    parser.add_argument("--pirated", type=int, default=2)
+    parser.add_argument("--malware", type=int, default=1)
+    parser.add_argument("--config-errors", type=int, default=1)
+    parser.add_argument("--ambiguous", type=int, default=1)
+    parser.add_argument("--online", action="store_true")
+    parser.add_argument("--proxy", choices=["BungeeCord", "Velocity"])
+    args = parser.parse_args()
+    spec = LogSpec(lines=args.lines, seed=args.seed, plugins=args.plugins, stack_traces=args.stack_traces,
+                   player_joins=args.player_joins, players=args.players, pirated=args.pirated, malware=args.malware,
+                   config_errors=args.config_errors, ambiguous=args.ambiguous, offline=not args.online, proxy=args.proxy)
+    for line in generate(spec):
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
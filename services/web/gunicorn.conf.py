@@ -0,0 +1,8 @@
+# gunicorn picks this up on its own when it's started from this directory
+
+
+def post_fork(server, worker):
+    # Every worker used to do this when it imported the app, the build fetches are leased through SQLite so
+    # only one worker goes to the Paper API for each version
+    from project.startup import warm_up
+    warm_up()
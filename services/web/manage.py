@@ -1,8 +1,19 @@
+import click
 from flask.cli import FlaskGroup
 
 from project import app
+from project.archive import scan_files
 
 cli = FlaskGroup(app)
 
+
+@cli.command("scan-logs", help="Run the checks over local log files, directories and globs, one JSON line per log")
+@click.argument("paths", nargs=-1, required=True)
+@click.option("--output", "-o", type=click.File("w"), default="-", help="Where the JSON lines go, stdout by default")
+@click.option("--workers", type=int, default=None, help="Parse processes, one per core by default")
+def scan_logs(paths, output, workers):
+    scan_files(paths, output, workers=workers)
+
+
 if __name__ == '__main__':
     cli()
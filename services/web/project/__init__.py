@@ -1,124 +1,35 @@
 import os
-from flask import Flask, render_template, jsonify, request, url_for, redirect
+from flask import Flask, render_template, jsonify, request, url_for, redirect, g, Response
 from .parser import LogFile
-from PIL import Image, ImageDraw, ImageFont
-from hashlib import sha256
-import requests
-import json
-from datetime import datetime as dt
-from datetime import timezone
+from .ingest import LogTooLargeError, CompressionError
+from .batch import parse_batch, BATCH_MAX_URLS
+from .uploads import spool_upload
+from .reports import render
+from .responses import get_report_format, result_response, UNKNOWN_FORMAT_ERROR
+from . import responses
+from . import result_store
+from .thumbnails import generate_output_image, thumbnail_store
+from . import metrics
+from .logs import setup_logging
 import random
+import logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', "CHANGEME")
-LAST_MANIFEST_UPDATE = None
-MANIFEST_INFO = {}
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) ",
-    "Content-Type": "application/json",
-}
-
-
-def make_rectangle_to_fit_text(text, color, backgound_color=(48, 49, 54)):
-    W, H = (350, 50)
-    im = Image.new("RGBA", (W, H), backgound_color)
-    draw = ImageDraw.Draw(im)
-    font = ImageFont.truetype("project/static/fonts/Roboto-Regular.ttf", 40)
-    # Draw a rounded rectangle in the middle of the image
-    draw.rounded_rectangle((0, 0, W, H), fill=color, radius=10)
-    w, h = draw.textsize(text, font=font)
-    # This'll center the text, for strings without Ys and Qs it'll be too low, we need to fix that
-    # This shit is jank but I suck at Pillow so it works
-    if "y" in text.lower() or "q" in text.lower():
-        draw.text(((W - w) / 2, (H - h) / 2), text, fill="white", font=font)
-    else:
-        draw.text(((W - w) / 2, ((H - h) / 2) - 5), text, fill="white", font=font)
-    return im
-
-
-def generate_output_image(log_data, url):
-    # Hash the url
-    url_hash = sha256(url.encode()).hexdigest()
-    # Check if the image already exists
-    if os.path.exists(f"project/static/parses/{url_hash}.png"):
-        return f"parses/{url_hash}.png"
-    img = Image.new("RGBA", (1200, 320), (48, 49, 54))
-
-    drawer = ImageDraw.Draw(img)
-    # Create a sub title with the url
-    subtitle_font = ImageFont.truetype("project/static/fonts/Roboto-Regular.ttf", 30)
-    drawer.text((40, 0), url.replace("https://", ""), (200, 200, 200), font=subtitle_font)
-
-    # First we'll do if the server is online or not
-    if log_data.is_offline:
-        status_rect = make_rectangle_to_fit_text("Offline Mode", (156, 26, 26))
-        img.paste(status_rect, (40, 80))
-    else:
-        status_rect = make_rectangle_to_fit_text("Online Mode", (28, 156, 26))
-        img.paste(status_rect, (40, 80))
 
-    # Malware detected, put this next to the online/offline box
-    if log_data.has_malware:
-        malware_rect = make_rectangle_to_fit_text("Malware Detected", (156, 26, 26))
-        img.paste(malware_rect, (40 + status_rect.width + 20, 80))
-    else:
-        malware_rect = make_rectangle_to_fit_text("No Malware", (28, 156, 26))
-        img.paste(malware_rect, (40 + status_rect.width + 20, 80))
 
-    if log_data.has_pirated_plugins:
-        piracy_rect = make_rectangle_to_fit_text("Pirated Plugins", (156, 26, 26))
-        img.paste(piracy_rect, (40 + status_rect.width + malware_rect.width + 40, 80))
-    else:
-        piracy_rect = make_rectangle_to_fit_text("No Piracy", (28, 156, 26))
-        img.paste(piracy_rect, (40 + status_rect.width + malware_rect.width + 40, 80))
-
-    # About half way down the image we wanna list the server's flavor
-    text_font = ImageFont.truetype("project/static/fonts/Roboto-Regular.ttf", 30)
-    flavor_line = log_data.flavor_line
-    flavor = flavor_line.split("This server is running")[1].split(" version ")[0].strip()
-    version = flavor_line.split("version ")[1].split(" (")[0].strip()
-    drawer.text((40, 180), f"{flavor} server {version}", (255, 255, 255), font=text_font)
-    # Add the plugin count
-    drawer.text((40, 230), f"Using {len(log_data.plugins)} plugins", (255, 255, 255), font=text_font)
-    if log_data.invalid_config:
-        drawer.text((40, 280), "Invalid config at: " + ".".join(log_data.invalid_config_locations), (255, 200, 200), font=text_font)
-    else:
-        # Add the exception count
-        drawer.text((40, 280), f"Encountered {len(log_data.exceptions)} exceptions", (255, 255, 255), font=text_font)
-    # Save the image
-    img.save(f"project/static/parses/{url_hash}.png")
-    return f"parses/{url_hash}.png"
-
-
-def parse_manifest_for_dates(manifest):
-    global MANIFEST_INFO
-    for version in manifest["versions"]:
-        version_name = version["id"]
-        release_time = version["releaseTime"]
-        # Parse the time "2023-03-14T12:56:18+00:00"
-        release_time = dt.strptime(release_time, "%Y-%m-%dT%H:%M:%S+00:00").replace(tzinfo=timezone.utc)
-        # Add it to the dict
-        MANIFEST_INFO[version_name] = release_time
-
-
-def get_mc_manifest_and_cache_it():
-    global LAST_MANIFEST_UPDATE
-    # If it's been more than an hour since we last updated the manifest, update it
-    if LAST_MANIFEST_UPDATE is None or (dt.now() - LAST_MANIFEST_UPDATE).seconds > 3600:
-        LAST_MANIFEST_UPDATE = dt.now()
-        manifest_url = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
-        manifest = requests.get(manifest_url, headers=headers).json()
-        with open("project/static/mc_manifest.json", "w") as f:
-            json.dump(manifest, f)
-        # We'll want to re-parse the manifest for dates
-        parse_manifest_for_dates(manifest)
-    else:
-        # Otherwise we just read the file from disk
-        with open("project/static/mc_manifest.json", "r") as f:
-            manifest = json.load(f)
+@app.before_request
+def start_timing():
+    responses.start_timing(g)
+
 
-    return manifest
+@app.after_request
+def finish_timing(response):
+    return responses.finish_timing(g, request, response)
 
 
 @app.route("/")
@@ -128,11 +39,11 @@ def index():
     url = request.args.get('url', None)
     if url:
         # We can do some fancy pre-parsing of the url here
-        log_file = LogFile(url)
+        log_file = LogFile(url, timings=g.timings)
         try:
             log_file.run_checks()
-        except Exception as e:
-            print(f"Error: {e}")
+        except Exception:
+            logger.exception("Error parsing %s", url)
         data = {
             "mc_version": log_file.mc_version,
             "paper_version": log_file.paper_version,
@@ -140,7 +51,8 @@ def index():
             "plugin_count": len(log_file.plugins),
             "has_malware": log_file.has_malware,
         }
-        image_path = generate_output_image(log_file, url)
+        with g.timings.stage("thumbnail"):
+            image_path = generate_output_image(log_file, url)
         return render_template('index.html', url=url, data=data, image_url=url_for('static', filename=image_path), version=version)
     return render_template("index.html", url=url, version=version)
 
@@ -154,17 +66,105 @@ def parse():
     log_url = body.get('logUrl', None)
     if log_url is None:
         return jsonify({"error": "No log URL provided", "success": False}), 400
+    report_format = get_report_format(body.get('format'))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
     # Create a new LogFile object
-    log_file = LogFile(log_url)
+    log_file = LogFile(log_url, timings=g.timings)
     try:
         log_file.run_checks()
-    except Exception as e:
-        print(f"Ran into error parsing log file: {e}")
+    except LogTooLargeError:
+        return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+    except CompressionError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+    except Exception:
+        logger.exception("Ran into error parsing log file %s", log_url)
         return jsonify({"error": "Ran into an issue parsing the logs. Possible incomplete log file.", "success": False}), 500
-    if len(log_file.lines) == 0:
+    if log_file.line_count == 0:
         return jsonify({"error": "No log lines found. Most likely caused by an unsupported URL.", "success": False}), 400
-    output = log_file.get_report_as_string()
-    return jsonify({"output": output, "success": True}), 200
+    with g.timings.stage("report"):
+        payload = render(log_file.get_result(), report_format)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/parse/batch", methods=["POST"])
+def parse_batch_route():
+    body = request.get_json(silent=True) or {}
+    log_urls = body.get('logUrls', None)
+    if not isinstance(log_urls, list) or len(log_urls) == 0:
+        return jsonify({"error": "No log URLs provided", "success": False}), 400
+    if not all(isinstance(log_url, str) for log_url in log_urls):
+        return jsonify({"error": "Log URLs must be strings", "success": False}), 400
+    if len(log_urls) > BATCH_MAX_URLS:
+        return jsonify({"error": f"Too many log URLs, the limit is {BATCH_MAX_URLS}", "success": False}), 413
+    report_format = get_report_format(body.get('format'))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    # Every url gets its own result, one bad log doesn't fail the rest
+    results = parse_batch(log_urls, report_format)
+    return result_response({"results": results, "success": True}, request, Response)
+
+
+@app.route("/parse/upload", methods=["POST"])
+def parse_upload():
+    # The log itself is the body, plain or compressed, so there's no paste site to fetch it from
+    report_format = get_report_format(request.args.get("format"))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    try:
+        with g.timings.stage("upload"):
+            upload = spool_upload(request.stream, request.content_length)
+    except LogTooLargeError:
+        return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+    with upload:
+        if upload.size == 0:
+            return jsonify({"error": "No log provided", "success": False}), 400
+        log_file = LogFile("", timings=g.timings)
+        try:
+            log_file.run_checks_on_upload(upload)
+        except LogTooLargeError:
+            return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+        except CompressionError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        except Exception:
+            logger.exception("Ran into error parsing an uploaded log file")
+            return jsonify({"error": "Ran into an issue parsing the logs. Possible incomplete log file.", "success": False}), 500
+    if log_file.line_count == 0:
+        return jsonify({"error": "No log lines found.", "success": False}), 400
+    with g.timings.stage("report"):
+        payload = render(log_file.get_result(), report_format)
+    payload["contentHash"] = log_file.content_hash
+    payload["shareUrl"] = url_for("shared_result", content_hash=log_file.content_hash, _external=True)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/parse/results/<string:content_hash>", methods=["GET"])
+def shared_result(content_hash):
+    report_format = get_report_format(request.args.get("format"))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    # Uploaded logs are only around for as long as their result is, RESULT_TTL
+    stored = result_store.get_by_hash(content_hash)
+    if stored is None:
+        return jsonify({"error": "No result for that log, it may have expired.", "success": False}), 404
+    log_file = LogFile("", timings=g.timings)
+    log_file.load_stored_result(stored)
+    payload = render(log_file.get_result(), report_format)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/thumbnails/stats", methods=["GET"])
+def thumbnail_stats():
+    # These are per worker, the file counts are for the whole store
+    return jsonify(thumbnail_store.stats()), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/age/<string:version>", methods=["GET"])
@@ -0,0 +1,125 @@
+import os
+import sys
+import glob
+import json
+import mmap
+import time
+import fnmatch
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .parser import LogFile
+from .ingest import LineStream, CHUNK_SIZE
+from .pool import PARSE_WORKERS, mark_worker, get_mp_context
+from .plugins import MALWARE
+from .rules import PIRATED
+
+logger = logging.getLogger(__name__)
+
+# What we pick up when walking a directory, rotated logs are usually gzipped
+LOG_FILE_PATTERNS = ["*.log", "*.log.gz", "*.log.xz", "*.log.zst", "*.txt"]
+# Seconds between progress lines
+PROGRESS_INTERVAL = float(os.environ.get("ARCHIVE_PROGRESS_INTERVAL", 2))
+# Rescanning old logs is for finding these after a new signature ships, so they're looked for all the way through
+ARCHIVE_UNLIMITED_RULES = (MALWARE, PIRATED)
+
+
+def is_log_file(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in LOG_FILE_PATTERNS)
+
+
+def expand_paths(paths):
+    # Files as they are, directories walked for anything that looks like a log, everything else is a glob
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, name) for name in sorted(files) if is_log_file(name))
+        else:
+            found.extend(sorted(match for match in glob.glob(path, recursive=True) if os.path.isfile(match)))
+    return list(dict.fromkeys(found))
+
+
+def iter_file_chunks(file, size):
+    if size == 0:
+        # mmap won't map an empty file
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for start in range(0, size, CHUNK_SIZE):
+            yield mapped[start:start + CHUNK_SIZE]
+
+
+def analyze_file(path):
+    # Runs in a parse worker, the line checks and everything after them that doesn't need the network
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(path)
+        log_file = LogFile(path, use_result_store=False)
+        for category in ARCHIVE_UNLIMITED_RULES:
+            log_file.rule_windows[category] = None
+        with open(path, "rb") as file:
+            # They're our own files, so all of it gets read, only the decompressed size is still capped
+            lines = LineStream(iter_file_chunks(file, size))
+            log_file.scan_stream(log_file.build_scanner(), lines)
+        if log_file.line_count > 0:
+            log_file.analyze_scan()
+        record = {"path": path, "success": True, "bytes": size}
+        record.update(log_file.to_dict())
+    except Exception as e:
+        logger.exception("Ran into error parsing log file %s", path)
+        record = {"path": path, "success": False, "error": str(e), "bytes": 0, "line_count": 0}
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+class Progress:
+    # Throughput so far, written to stderr so it doesn't end up in the JSON lines
+    def __init__(self, total, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.started_at = time.perf_counter()
+        self.last_report = 0.0
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.lines = 0
+        self.malware = 0
+        self.pirated = 0
+
+    def add(self, record):
+        self.done += 1
+        self.bytes += record["bytes"]
+        self.lines += record["line_count"]
+        if not record["success"]:
+            self.failed += 1
+        else:
+            self.malware += record["has_malware"]
+            self.pirated += record["has_pirated_plugins"]
+        now = time.perf_counter()
+        if now - self.last_report >= PROGRESS_INTERVAL or self.done == self.total:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        print(f"{self.done}/{self.total} logs, {self.bytes / 1024 / 1024:.1f} MiB, "
+              f"{self.bytes / 1024 / 1024 / elapsed:.1f} MiB/s, {self.lines / elapsed:,.0f} lines/s, "
+              f"{self.malware} with malware, {self.pirated} with pirated plugins, {self.failed} failed",
+              file=self.stream, flush=True)
+
+
+def scan_files(paths, output, workers=None):
+    # One JSON line per log, in the order they were found
+    paths = expand_paths(paths)
+    progress = Progress(len(paths))
+    if not paths:
+        progress.report()
+        return progress
+    with ProcessPoolExecutor(max_workers=workers or PARSE_WORKERS, mp_context=get_mp_context(), initializer=mark_worker) as pool:
+        # Small batches so the workers aren't waiting on us between every file
+        for record in pool.map(analyze_file, paths, chunksize=4):
+            output.write(json.dumps(record) + "\n")
+            progress.add(record)
+    return progress
@@ -0,0 +1,169 @@
+import os
+import asyncio
+import logging
+from quart import Quart, render_template, jsonify, request, url_for, g, Response
+from .async_parser import AsyncLogFile
+from .async_http import async_client
+from .ingest import LogTooLargeError, CompressionError
+from .pool import get_parse_pool
+from .store import run_in_thread
+from .uploads import UploadSpool
+from .reports import render
+from .responses import get_report_format, result_response, UNKNOWN_FORMAT_ERROR
+from . import responses
+from . import result_store
+from .thumbnails import generate_output_image, thumbnail_store
+from . import metrics
+from .logs import setup_logging
+from .startup import warm_up
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# The parse routes again, for serving with uvicorn (uvicorn project.asgi:app) where one process can wait on hundreds of slow pastes
+app = Quart(__name__)
+
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', "CHANGEME")
+
+
+@app.before_serving
+async def startup():
+    # Get the parse workers started before the first request has to wait on them
+    get_parse_pool()
+    warm_up()
+
+
+@app.after_serving
+async def shutdown():
+    await async_client.close()
+
+
+@app.before_request
+async def start_timing():
+    responses.start_timing(g)
+
+
+@app.after_request
+async def finish_timing(response):
+    return responses.finish_timing(g, request, response)
+
+
+@app.route("/")
+async def index():
+    version = "1.2.0"
+    url = request.args.get('url', None)
+    if url:
+        log_file = AsyncLogFile(url, timings=g.timings)
+        try:
+            await log_file.run_checks_async()
+        except Exception:
+            logger.exception("Error parsing %s", url)
+        data = {
+            "mc_version": log_file.mc_version,
+            "paper_version": log_file.paper_version,
+            "offline": log_file.is_offline,
+            "plugin_count": len(log_file.plugins),
+            "has_malware": log_file.has_malware,
+        }
+        # Drawing and saving the thumbnail is blocking work, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        with g.timings.stage("thumbnail"):
+            image_path = await loop.run_in_executor(None, generate_output_image, log_file, url)
+        return await render_template('index.html', url=url, data=data, image_url=url_for('static', filename=image_path), version=version)
+    return await render_template("index.html", url=url, version=version)
+
+
+@app.route("/parse", methods=["POST"])
+async def parse():
+    body = await request.get_json()
+    log_url = body.get('logUrl', None)
+    if log_url is None:
+        return jsonify({"error": "No log URL provided", "success": False}), 400
+    report_format = get_report_format(body.get('format'))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    log_file = AsyncLogFile(log_url, timings=g.timings)
+    try:
+        await log_file.run_checks_async()
+    except LogTooLargeError:
+        return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+    except CompressionError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+    except Exception:
+        logger.exception("Ran into error parsing log file %s", log_url)
+        return jsonify({"error": "Ran into an issue parsing the logs. Possible incomplete log file.", "success": False}), 500
+    if log_file.line_count == 0:
+        return jsonify({"error": "No log lines found. Most likely caused by an unsupported URL.", "success": False}), 400
+    with g.timings.stage("report"):
+        payload = render(log_file.get_result(), report_format)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/parse/upload", methods=["POST"])
+async def parse_upload():
+    report_format = get_report_format(request.args.get("format"))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    try:
+        with g.timings.stage("upload"):
+            upload = UploadSpool(request.content_length)
+            try:
+                async for chunk in request.body:
+                    upload.write(chunk)
+            except Exception:
+                upload.close()
+                raise
+            upload.finish()
+    except LogTooLargeError:
+        return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+    with upload:
+        if upload.size == 0:
+            return jsonify({"error": "No log provided", "success": False}), 400
+        log_file = AsyncLogFile("", timings=g.timings)
+        try:
+            await log_file.run_checks_on_upload_async(upload)
+        except LogTooLargeError:
+            return jsonify({"error": "That log is too large to parse.", "success": False}), 413
+        except CompressionError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        except Exception:
+            logger.exception("Ran into error parsing an uploaded log file")
+            return jsonify({"error": "Ran into an issue parsing the logs. Possible incomplete log file.", "success": False}), 500
+    if log_file.line_count == 0:
+        return jsonify({"error": "No log lines found.", "success": False}), 400
+    with g.timings.stage("report"):
+        payload = render(log_file.get_result(), report_format)
+    payload["contentHash"] = log_file.content_hash
+    payload["shareUrl"] = url_for("shared_result", content_hash=log_file.content_hash, _external=True)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/parse/results/<string:content_hash>", methods=["GET"])
+async def shared_result(content_hash):
+    report_format = get_report_format(request.args.get("format"))
+    if report_format is None:
+        return jsonify({"error": UNKNOWN_FORMAT_ERROR, "success": False}), 400
+    stored = await run_in_thread(result_store.get_by_hash, content_hash)
+    if stored is None:
+        return jsonify({"error": "No result for that log, it may have expired.", "success": False}), 404
+    log_file = AsyncLogFile("", timings=g.timings)
+    log_file.load_dict(stored)
+    log_file.latest_paper_version = await log_file.get_latest_paper_version_async()
+    payload = render(log_file.get_result(), report_format)
+    payload["success"] = True
+    return result_response(payload, request, Response)
+
+
+@app.route("/thumbnails/stats", methods=["GET"])
+async def thumbnail_stats():
+    loop = asyncio.get_running_loop()
+    # Walks the thumbnail directory, so it goes to a thread
+    stats = await loop.run_in_executor(None, thumbnail_store.stats)
+    return jsonify(stats), 200
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics_route():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
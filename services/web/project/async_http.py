@@ -0,0 +1,66 @@
+import os
+import asyncio
+import httpx
+from .http_client import Deadline, CONNECT_TIMEOUT, READ_TIMEOUT, REQUEST_DEADLINE, MAX_RETRIES, RETRY_BACKOFF, RETRY_STATUSES, POOL_HOSTS, POOL_SIZE
+
+# Waiting on a socket costs us next to nothing here, so we can have a lot more of them open than the sync workers
+MAX_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_MAX_CONNECTIONS", 500))
+
+
+class AsyncHttpClient:
+    # The async twin of HttpClient, same timeouts, deadline and retries
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, deadline=REQUEST_DEADLINE,
+                 max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF, max_connections=MAX_CONNECTIONS,
+                 keepalive=POOL_HOSTS * POOL_SIZE):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=keepalive)
+        self.client = None
+
+    def get_client(self):
+        # httpx clients belong to the event loop they're made on, so wait until we're on it
+        if self.client is None:
+            self.client = httpx.AsyncClient(limits=self.limits, follow_redirects=True)
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def send(self, url, headers=None, deadline=None, stream=False):
+        if deadline is None:
+            deadline = Deadline(self.deadline)
+        attempt = 0
+        while True:
+            connect_timeout, read_timeout = deadline.timeout(self.connect_timeout, self.read_timeout)
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+            request = self.get_client().build_request("GET", url, headers=headers, timeout=timeout)
+            try:
+                resp = await self.get_client().send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return resp
+                # We'd rather hand back the last bad response than raise, callers already check the status
+                await resp.aclose()
+            # Same backoff urllib3 uses, the first retry goes straight away
+            delay = self.backoff * (2 ** (attempt - 1)) if attempt > 0 else 0
+            attempt += 1
+            if delay:
+                await asyncio.sleep(min(delay, max(deadline.remaining(), 0)))
+
+    async def get(self, url, headers=None, deadline=None):
+        return await self.send(url, headers=headers, deadline=deadline)
+
+    async def stream(self, url, headers=None, deadline=None):
+        # The caller has to aclose() this one
+        return await self.send(url, headers=headers, deadline=deadline, stream=True)
+
+
+async_client = AsyncHttpClient()
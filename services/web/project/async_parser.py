@@ -0,0 +1,166 @@
+import os
+import asyncio
+import httpx
+import requests
+import logging
+from requests.utils import get_encoding_from_headers
+from .parser import LogFile, player_cache, get_playerdb_url
+from .ingest import LineStream, LogTooLargeError, CHUNK_SIZE
+from .http_client import Deadline
+from .async_http import async_client
+from .store import run_in_thread
+from .pool import get_parse_pool, PARSE_WORKERS
+from . import paper_builds
+from . import result_store
+
+logger = logging.getLogger(__name__)
+
+# Downloaded bodies are held in memory until a parse worker is done with them, so only this many at once
+MAX_BODIES_IN_FLIGHT = int(os.environ.get("MAX_BODIES_IN_FLIGHT", PARSE_WORKERS * 2))
+body_slots = asyncio.Semaphore(MAX_BODIES_IN_FLIGHT)
+
+
+def analyze_body(url, chunks, encoding):
+    # Runs in a parse worker, the same single pass run_checks does as the log downloads
+    log_file = LogFile(url, use_result_store=False)
+    lines = LineStream(chunks, encoding=encoding, max_lines=log_file.max_fetch_lines, max_bytes=log_file.max_fetch_bytes)
+    log_file.scan_stream(log_file.build_scanner(), lines)
+    if log_file.line_count > 0:
+        log_file.analyze_scan()
+    return log_file.to_dict()
+
+
+def analyze_upload(url, path):
+    # Also runs in a parse worker, it reads the upload from our disk itself
+    with open(path, "rb") as f:
+        return analyze_body(url, iter(lambda: f.read(CHUNK_SIZE), b""), "utf-8")
+
+
+class AsyncLogFile(LogFile):
+    # Waits on the network without holding a thread, only the parsing itself goes off to the parse pool
+    async def run_checks_async(self):
+        if self.use_result_store:
+            with self.timings.stage("store"):
+                stored = await run_in_thread(result_store.get_by_url, self.url)
+            if stored is not None:
+                self.load_dict(stored)
+                self.latest_paper_version = await self.get_latest_paper_version_async()
+                return
+        self.get_host_from_url()
+        async with body_slots:
+            data = await self.fetch_and_analyze_async()
+        if data is None:
+            return
+        self.load_dict(data)
+        if self.line_count == 0:
+            return
+        await self.run_lookups_async()
+
+    async def fetch_and_analyze_async(self):
+        # The body is let go of when this returns, before the player lookups
+        fetched = await self.fetch_body_async()
+        if fetched is None:
+            return None
+        chunks, encoding = fetched
+        loop = asyncio.get_running_loop()
+        with self.timings.stage("parse_pool"):
+            return await loop.run_in_executor(get_parse_pool(), analyze_body, self.url, chunks, encoding)
+
+    async def run_checks_on_upload_async(self, upload):
+        # The worker gets the upload's path and reads it from disk, so the body is never sent over whole
+        loop = asyncio.get_running_loop()
+        with self.timings.stage("upload"):
+            path = await run_in_thread(upload.rollover)
+        with self.timings.stage("parse_pool"):
+            data = await loop.run_in_executor(get_parse_pool(), analyze_upload, self.url, path)
+        self.load_dict(data)
+        if self.line_count == 0:
+            return
+        # The share link needs something to point at, even if some players couldn't be checked this time
+        await self.run_lookups_async(always_store=True)
+
+    async def run_lookups_async(self, always_store=False):
+        if self.use_result_store:
+            with self.timings.stage("store"):
+                stored = await run_in_thread(result_store.get_reusable_by_hash, self.content_hash)
+            if stored is not None:
+                self.load_dict(stored)
+                await run_in_thread(result_store.remember_url, self.url, self.content_hash)
+                self.latest_paper_version = await self.get_latest_paper_version_async()
+                return
+        self.latest_paper_version = await self.get_latest_paper_version_async()
+        with self.timings.stage("players"):
+            await self.validate_players_async()
+        if self.use_result_store and (always_store or len(self.unverified_players) == 0):
+            with self.timings.stage("store"):
+                await run_in_thread(result_store.put, self.url, self.content_hash, self.to_dict())
+
+    async def get_raw_url_async(self, deadline=None):
+        if self.host == "paste.gg" and not self.url.endswith("raw"):
+            resp = await async_client.get(self.url, headers=self.headers, deadline=deadline)
+            return self.get_paste_gg_raw_url(resp.text)
+        # Every other host is just rewriting the url
+        return self.get_raw_url(deadline)
+
+    async def fetch_body_async(self):
+        # Returns the raw chunks and their encoding, cut off past max_fetch_bytes, the parse worker splits them into lines
+        deadline = Deadline()
+        with self.timings.stage("fetch"):
+            return await self.download_async(deadline)
+
+    async def download_async(self, deadline):
+        raw_url = await self.get_raw_url_async(deadline)
+        if raw_url is None:
+            return None
+        resp = await async_client.stream(raw_url, headers=self.headers, deadline=deadline)
+        try:
+            content_length = resp.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+                raise LogTooLargeError(f"Log is {content_length} bytes, the limit is {self.max_body_bytes}")
+            chunks = []
+            bytes_read = 0
+            async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                deadline.check()
+                chunks.append(chunk)
+                bytes_read += len(chunk)
+                if bytes_read > self.max_fetch_bytes:
+                    # The LineStream sees we went over and marks the log as truncated
+                    break
+        finally:
+            await resp.aclose()
+        # Decoded the same way requests would have
+        return chunks, get_encoding_from_headers(resp.headers) or "utf-8"
+
+    async def get_latest_paper_version_async(self):
+        try:
+            with self.timings.stage("paper_api"):
+                return await paper_builds.get_latest_build_async(self.mc_version, async_client)
+        except (httpx.HTTPError, requests.RequestException) as e:
+            logger.warning("Couldn't get the latest Paper build for %s: %s", self.mc_version, e)
+            return None
+
+    async def request_player_username_async(self, uuid, semaphore, deadline=None):
+        async with semaphore:
+            return await async_client.get(get_playerdb_url(uuid), headers=self.headers, deadline=deadline)
+
+    async def validate_players_async(self):
+        if len(self.players) == 0:
+            return
+        deadline = Deadline(self.player_validation_deadline)
+        # One query for everyone we already know, only the rest go out to playerdb.co
+        usernames = await run_in_thread(self.lookup_cached_usernames, [player["uuid"] for player in self.players])
+        uuids = list(dict.fromkeys(player["uuid"] for player in self.players if player["uuid"] not in usernames))
+        if len(uuids) > 0:
+            semaphore = asyncio.Semaphore(self.player_validation_concurrency)
+            tasks = {uuid: asyncio.ensure_future(self.request_player_username_async(uuid, semaphore, deadline)) for uuid in uuids}
+            done, pending = await asyncio.wait(tasks.values(), timeout=max(deadline.remaining(), 0))
+            for task in pending:
+                task.cancel()
+            responses = {uuid: task.result() for uuid, task in tasks.items() if task in done and task.exception() is None}
+            # It caches what playerdb said, all from one thread
+            usernames.update(await run_in_thread(self.read_playerdb_responses, responses))
+        for player in self.players:
+            if player["uuid"] not in usernames:
+                self.unverified_players.append(player)
+            elif not self.check_player_username(player, usernames[player["uuid"]]):
+                self.invalid_players.append(player)
@@ -0,0 +1,120 @@
+import os
+import threading
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from .parser import LogFile
+from .ingest import LogTooLargeError, CompressionError
+from . import result_store
+from .pool import get_parse_pool
+from .shards import SHARD_MIN_LINES
+from .reports import render
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_URLS = int(os.environ.get("BATCH_MAX_URLS", 50))
+# Downloads are mostly waiting on the paste sites, so these are threads
+BATCH_FETCH_WORKERS = int(os.environ.get("BATCH_FETCH_WORKERS", 16))
+# How many downloads we'll have going at once from each paste site, so a big thread doesn't get us rate limited
+HOST_CONCURRENCY = {
+    "paste.gg": int(os.environ.get("BATCH_PASTE_GG_CONCURRENCY", 4)),
+    "pastes.dev": int(os.environ.get("BATCH_PASTES_DEV_CONCURRENCY", 4)),
+    "pastebin.com": int(os.environ.get("BATCH_PASTEBIN_CONCURRENCY", 2)),
+    "mclo.gs": int(os.environ.get("BATCH_MCLOGS_CONCURRENCY", 4)),
+}
+DEFAULT_HOST_CONCURRENCY = 2
+
+# Shared by every batch in this worker, so two batches from the same thread still respect the caps
+host_semaphores = {host: threading.BoundedSemaphore(limit) for host, limit in HOST_CONCURRENCY.items()}
+host_semaphores_lock = threading.Lock()
+
+
+class BatchError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_host_key(url):
+    host = urlparse(url).netloc
+    # api.pastes.dev is the same site as pastes.dev
+    if host.startswith("api."):
+        host = host[len("api."):]
+    return host
+
+
+def get_host_semaphore(url):
+    host = get_host_key(url)
+    with host_semaphores_lock:
+        semaphore = host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(DEFAULT_HOST_CONCURRENCY)
+            host_semaphores[host] = semaphore
+    return semaphore
+
+
+def analyze_lines(url, lines):
+    # Runs in a parse worker, everything that doesn't need the network
+    log_file = LogFile(url, use_result_store=False)
+    log_file.scan_lines(lines)
+    if log_file.line_count > 0:
+        log_file.analyze_scan()
+    return log_file.to_dict()
+
+
+def parse_url(url):
+    log_file = LogFile(url)
+    stored = result_store.get_by_url(url)
+    if stored is not None:
+        log_file.load_stored_result(stored)
+        return log_file
+    log_file.get_host_from_url()
+    with get_host_semaphore(url):
+        lines = log_file.read_url_into_memory()
+    if len(lines) == 0:
+        raise BatchError("No log lines found. Most likely caused by an unsupported URL.", 400)
+    if log_file.load_from_store_by_hash():
+        return log_file
+    if len(lines) >= SHARD_MIN_LINES:
+        # Big enough that it gets split up over the whole pool instead of going to one worker
+        log_file.scan_lines(lines)
+        log_file.analyze_scan()
+        log_file.run_lookups()
+        return log_file
+    content_hash = log_file.content_hash
+    truncated = log_file.truncated
+    with log_file.timings.stage("parse_pool"):
+        data = get_parse_pool().submit(analyze_lines, url, lines).result()
+    log_file.load_dict(data)
+    log_file.content_hash = content_hash
+    log_file.truncated = truncated
+    log_file.run_lookups()
+    return log_file
+
+
+def parse_url_safely(url, report_format="ansi"):
+    # Whatever goes wrong with one log stays with that log
+    try:
+        log_file = parse_url(url)
+        result = render(log_file.get_result(), report_format)
+        result.update({"url": url, "success": True})
+        return result
+    except BatchError as e:
+        return {"url": url, "error": e.message, "status": e.status, "success": False}
+    except LogTooLargeError:
+        return {"url": url, "error": "That log is too large to parse.", "status": 413, "success": False}
+    except CompressionError as e:
+        return {"url": url, "error": str(e), "status": 400, "success": False}
+    except Exception:
+        logger.exception("Ran into error parsing log file %s", url)
+        return {"url": url, "error": "Ran into an issue parsing the logs. Possible incomplete log file.", "status": 500, "success": False}
+
+
+def parse_batch(urls, report_format="ansi"):
+    # The same paste can turn up more than once in a thread, only do it once
+    unique_urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max(min(BATCH_FETCH_WORKERS, len(unique_urls)), 1)) as pool:
+        results = dict(zip(unique_urls, pool.map(partial(parse_url_safely, report_format=report_format), unique_urls)))
+    return [results[url] for url in urls]
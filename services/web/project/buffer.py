@@ -0,0 +1,88 @@
+from array import array
+
+# Line offsets fit in 4 bytes until the log gets past 4 GiB, which MAX_BODY_BYTES keeps us well under
+OFFSET_TYPE = "I"
+# Iterating decodes this many lines in one go, it's a lot faster than a line at a time
+ITER_BLOCK_LINES = 1024
+
+
+class LogBuffer:
+    # A log held as one UTF-8 buffer plus where each line starts, rather than a str per line
+    # Lines are decoded when they're asked for, and slicing it gives a window onto the same memory
+    def __init__(self, data=None, offsets=None, first=0, last=None):
+        self.data = data if data is not None else bytearray()
+        # Line i is data[offsets[i]:offsets[i + 1]], its \n included
+        self.offsets = offsets if offsets is not None else array(OFFSET_TYPE, [0])
+        self.first = first
+        self.last = last
+        self.view = None
+
+    def extend(self, lines):
+        data = self.data
+        offsets = self.offsets
+        for line in lines:
+            data += line.encode("utf-8", "surrogatepass")
+            data += b"\n"
+            try:
+                offsets.append(len(data))
+            except OverflowError:
+                self.offsets = offsets = array("Q", offsets)
+                offsets.append(len(data))
+
+    def get_view(self):
+        # Taken once we're reading, a bytearray can't grow while there's a view on it
+        if self.view is None:
+            self.view = memoryview(self.data)
+        return self.view
+
+    def end(self):
+        return self.last if self.last is not None else len(self.offsets) - 1
+
+    def __len__(self):
+        return self.end() - self.first
+
+    def decode(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1] - 1].decode("utf-8", "surrogatepass")
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("LogBuffer slices can't have a step")
+            return self.window(start, max(start, stop))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("line index out of range")
+        return self.decode(self.first + key)
+
+    def __iter__(self):
+        # Lines can't have a \n in them, splitlines already took them all out
+        data = self.data
+        offsets = self.offsets
+        start = self.first
+        end = self.end()
+        while start < end:
+            stop = min(start + ITER_BLOCK_LINES, end)
+            yield from data[offsets[start]:offsets[stop] - 1].decode("utf-8", "surrogatepass").split("\n")
+            start = stop
+
+    def window(self, start, end):
+        # Lines start to end of this one, sharing its buffer and index
+        return LogBuffer(self.data, self.offsets, self.first + start, self.first + end)
+
+    def context(self, index, radius=5):
+        # The lines around one, for showing where an exception or a config error came from
+        return self.window(max(index - radius, 0), min(index + radius + 1, len(self)))
+
+    def raw(self):
+        return self.get_view()[self.offsets[self.first]:self.offsets[self.end()]]
+
+    def __getstate__(self):
+        # Only this window's lines get copied when it's sent to another process
+        base = self.offsets[self.first]
+        offsets = array(self.offsets.typecode, (offset - base for offset in self.offsets[self.first:self.end() + 1]))
+        return {"data": bytes(self.raw()), "offsets": offsets}
+
+    def __setstate__(self, state):
+        self.__init__(state["data"], state["offsets"])
@@ -0,0 +1,46 @@
+import json
+
+# Both optional, the standard library json does the same job a bit slower
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+def dumps(value):
+    # Compact JSON as bytes
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def can_pack():
+    return msgpack is not None
+
+
+def packb(value):
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def unpackb(raw):
+    return msgpack.unpackb(raw, raw=False)
+
+
+def encode(value, accept=""):
+    # The body and mimetype for a response, msgpack if the client asked for it and we have it
+    if MSGPACK_MIMETYPE in (accept or "") and can_pack():
+        return packb(value), MSGPACK_MIMETYPE
+    return dumps(value), JSON_MIMETYPE
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+from colorama import Fore
+from .parser import LogFile
+from .scanner import Scanner
+from .plugins import Plugin, MALWARE
+from .ingest import CHUNK_SIZE
+
+# Seconds between looking for new lines
+FOLLOW_INTERVAL = float(os.environ.get("FOLLOW_INTERVAL", 1))
+# A one off parse only looks for these near the start of the log, on a running server they can turn up at any time
+FOLLOW_UNLIMITED_CHECKS = ("exceptions",)
+# Same goes for these categories of rule
+FOLLOW_UNLIMITED_RULES = (MALWARE,)
+# The lists the checks add to as they go, anything past what we've already reported is new
+FOLLOWED_LISTS = ["plugins", "weird_plugins_acquired", "ambiguous_plugins", "potentially_pirated_lines",
+                  "missing_dependencies", "players"]
+
+
+class LogFollower:
+    # Keeps the checks' state between polls of a log that's still being written, so each poll only reads what was added
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.reset()
+
+    def reset(self):
+        # A new latest.log means the server restarted, nothing from the old one carries over
+        self.log_file = LogFile(self.path, use_result_store=False)
+        for category in FOLLOW_UNLIMITED_RULES:
+            self.log_file.rule_windows[category] = None
+        self.scanner = Scanner()
+        for check in self.log_file.line_checks():
+            if check["name"] in FOLLOW_UNLIMITED_CHECKS:
+                check = dict(check, max_lines=None)
+            self.scanner.register(**check)
+        self.plugins_checked = False
+        self.reported_counts = {field: 0 for field in FOLLOWED_LISTS}
+        self.reported_signatures = set()
+        self.reported = {}
+
+    def open(self):
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.offset = 0
+        self.partial = b""
+        return True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def rotated(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Moved away and the new one isn't there yet, keep reading the old one for now
+            return False
+        # Either a new file took its place, or it was truncated in place (copytruncate)
+        return stat.st_ino != self.inode or stat.st_size < self.offset
+
+    def poll(self):
+        # Returns the findings from whatever was written since the last poll
+        if self.file is None and not self.open():
+            return []
+        findings = self.read_new_lines()
+        if self.rotated():
+            # Whatever made it into the old file before the switch, then wrap it up like the log ended there
+            findings.extend(self.read_new_lines())
+            if self.partial:
+                self.feed(self.partial)
+            self.scanner.finish()
+            findings.extend(self.collect_findings())
+            self.close()
+            self.reset()
+            findings.append({"type": "rotated", "data": self.path})
+            if self.open():
+                findings.extend(self.read_new_lines())
+        return findings
+
+    def read_new_lines(self):
+        while True:
+            chunk = self.file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self.offset += len(chunk)
+            lines = (self.partial + chunk).split(b"\n")
+            # The last one isn't finished being written yet
+            self.partial = lines.pop()
+            for line in lines:
+                self.feed(line)
+        return self.collect_findings()
+
+    def feed(self, line):
+        self.scanner.feed(line.rstrip(b"\r").decode("utf-8", "replace"))
+
+    def collect_findings(self):
+        log_file = self.log_file
+        findings = []
+        if log_file.flavor_line is not None and self.report_once("flavor", log_file.flavor_line):
+            findings.append({"type": "flavor", "data": {"flavor": log_file.flavor, "mc_version": log_file.mc_version,
+                                                        "supported": log_file.supported}})
+        if not self.plugins_checked and self.plugins_done():
+            # The plugin list is complete, so now it's worth checking
+            self.plugins_checked = True
+            log_file.check_for_weird_plugins()
+            log_file.check_for_malware_plugins()
+            log_file.check_possibly_cracked()
+        for field in FOLLOWED_LISTS:
+            items = getattr(log_file, field)
+            for item in items[self.reported_counts[field]:]:
+                if isinstance(item, Plugin):
+                    item = {"name": item.name, "version": item.version}
+                findings.append({"type": field, "data": item})
+            self.reported_counts[field] = len(items)
+        findings.extend(self.collect_exceptions())
+        # The offline check only looks at its windows when it sees a line it cares about, which could be a long wait
+        log_file.expire_offline_windows(self.scanner.line_count)
+        if log_file.malware_count > self.reported.get("malware_count", 0):
+            self.reported["malware_count"] = log_file.malware_count
+            findings.append({"type": "malware", "data": log_file.malware_count})
+        if log_file.is_offline and self.report_once("offline", True):
+            findings.append({"type": "offline", "data": True})
+        if log_file.using_proxy and self.report_once("proxy", log_file.proxy_flavor):
+            findings.append({"type": "proxy", "data": log_file.proxy_flavor})
+        if log_file.invalid_config and self.report_once("config", log_file.mock_config):
+            findings.append({"type": "config", "data": log_file.invalid_config_locations})
+        if log_file.attempting_to_downgrade and self.report_once("downgrade", log_file.downgraded_versions):
+            findings.append({"type": "downgrade", "data": log_file.downgraded_versions})
+        return findings
+
+    def report_once(self, key, value):
+        if self.reported.get(key) == value:
+            return False
+        self.reported[key] = value
+        return True
+
+    def plugins_done(self):
+        return any(handler.done for handler in self.scanner.handlers if handler.name == "plugins")
+
+    def collect_exceptions(self):
+        grouper = self.log_file.trace_grouper
+        # Once a line has gone by that isn't part of the open trace, nothing more can be added to it
+        if grouper.header is not None and grouper.last_index < self.scanner.line_count - 1:
+            grouper.close()
+        findings = []
+        for signature, group in grouper.groups.items():
+            if signature not in self.reported_signatures:
+                self.reported_signatures.add(signature)
+                findings.append({"type": "exception", "data": group})
+        return findings
+
+
+def describe_finding(finding):
+    kind = finding["type"]
+    data = finding["data"]
+    if kind == "flavor":
+        color = Fore.GREEN if data["supported"] else Fore.RED
+        return f"{color}Server: {data['flavor']} {data['mc_version']}{Fore.RESET}"
+    if kind == "plugins":
+        return f"{Fore.GREEN}Plugin: {data['name']} v{data['version']}{Fore.RESET}"
+    if kind == "weird_plugins_acquired":
+        return f"{Fore.CYAN}Possibly cracked, found {data['name']} v{data['version']}{Fore.RESET}"
+    if kind == "ambiguous_plugins":
+        return f"{Fore.YELLOW}Ambiguous plugin: {data['plugin_name']} {data['plugin_filenames']}{Fore.RESET}"
+    if kind == "potentially_pirated_lines":
+        return f"{Fore.CYAN}Pirated plugin: {data}{Fore.RESET}"
+    if kind == "missing_dependencies":
+        return f"{Fore.CYAN}Missing dependencies: {data}{Fore.RESET}"
+    if kind == "players":
+        return f"{Fore.WHITE}Player: {data['username']} ({data['uuid']}){Fore.RESET}"
+    if kind == "exception":
+        return f"{Fore.CYAN}Exception on line {data['line_number']}: {data['line']}{Fore.RESET}"
+    if kind == "malware":
+        return f"{Fore.RED}Malware found, {data} so far{Fore.RESET}"
+    if kind == "offline":
+        return f"{Fore.RED}Offline Mode: True{Fore.RESET}"
+    if kind == "proxy":
+        return f"{Fore.CYAN}Using {data} proxy{Fore.RESET}"
+    if kind == "config":
+        return f"{Fore.RED}Invalid config at {', '.join(data)}{Fore.RESET}"
+    if kind == "downgrade":
+        return f"{Fore.RED}Chunks were saved with {data[0]}, the server is on {data[1]}{Fore.RESET}"
+    if kind == "rotated":
+        return f"{Fore.YELLOW}{data} was rotated, starting over{Fore.RESET}"
+    return f"{kind}: {data}"
+
+
+def follow(path, interval=FOLLOW_INTERVAL, as_json=False):
+    follower = LogFollower(path)
+    try:
+        while True:
+            for finding in follower.poll():
+                print(json.dumps(finding) if as_json else describe_finding(finding), flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
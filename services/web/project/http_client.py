@@ -0,0 +1,83 @@
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 10))
+# The most time a single request (retries and body download included) is allowed to take
+REQUEST_DEADLINE = float(os.environ.get("HTTP_REQUEST_DEADLINE", 30))
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 2))
+RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.3))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# How many hosts we keep pools for, and how many connections we keep open to each of them
+POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", 16))
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+
+
+class DeadlineExceeded(requests.Timeout):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds=REQUEST_DEADLINE):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(f"Ran out of time after {self.seconds} seconds")
+
+    def timeout(self, connect_timeout, read_timeout):
+        # Never wait on a socket for longer than we've got left
+        self.check()
+        remaining = self.remaining()
+        return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+
+class HttpClient:
+    # One shared session so connections (and their TLS handshakes) get reused between requests
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, deadline=REQUEST_DEADLINE,
+                 max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF, pool_hosts=POOL_HOSTS, pool_size=POOL_SIZE):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Retries are ours rather than urllib3's, so every attempt gets what's left of the deadline and no more
+        # Retry-After is ignored too, a long one would blow straight through it
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, headers=None, deadline=None, **kwargs):
+        if deadline is None:
+            deadline = Deadline(self.deadline)
+        attempt = 0
+        while True:
+            timeout = deadline.timeout(self.connect_timeout, self.read_timeout)
+            try:
+                resp = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or deadline.expired():
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries or deadline.expired():
+                    # We'd rather hand back the last bad response than raise, callers already check the status
+                    return resp
+                resp.close()
+            # Same backoff as the async client, the first retry goes straight away
+            delay = self.backoff * (2 ** (attempt - 1)) if attempt > 0 else 0
+            attempt += 1
+            if delay:
+                time.sleep(min(delay, max(deadline.remaining(), 0)))
+
+
+client = HttpClient()
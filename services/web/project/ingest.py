@@ -0,0 +1,235 @@
+import os
+import io
+import time
+import zlib
+import gzip
+import lzma
+import codecs
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+# How big a compressed log is allowed to get once it's decompressed, anything past this is a zip bomb
+MAX_DECOMPRESSED_BYTES = int(os.environ.get("MAX_DECOMPRESSED_BYTES", 256 * 1024 * 1024))
+# Characters kept from any one line, a log that's one giant line still gets read but only this much of it is kept
+MAX_LINE_LENGTH = int(os.environ.get("MAX_LINE_LENGTH", 1024 * 1024))
+# Everything str.splitlines splits on
+LINE_BREAKS = ("\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
+# What compressed logs start with, a text log never will
+MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+MAGIC_LENGTH = max(len(magic) for magic in MAGIC_NUMBERS.values())
+DECOMPRESS_ERRORS = (OSError, zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class LogTooLargeError(Exception):
+    pass
+
+
+class CompressionError(Exception):
+    pass
+
+
+class LineStream:
+    # Turns an iterable of byte chunks into lines, stopping once we've read as much as we're willing to
+    def __init__(self, chunks, encoding="utf-8", max_lines=None, max_bytes=None, deadline=None, max_decompressed_bytes=MAX_DECOMPRESSED_BYTES):
+        self.chunks = chunks
+        self.encoding = encoding or "utf-8"
+        self.max_lines = max_lines
+        # These are counted after decompressing, so a compressed log gets the same limits as a plain one
+        self.max_bytes = max_bytes
+        self.max_decompressed_bytes = max_decompressed_bytes
+        self.deadline = deadline
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.truncated = False
+        self.cut_mid_line = False
+        # Time spent waiting on the next chunk, which for a download is the network
+        self.wait_seconds = 0.0
+
+    def __iter__(self):
+        # We hold on to one line so a line cut in half by the byte limit can be dropped
+        previous = None
+        for line in iter_text_lines(self.iter_chunks(), self.encoding):
+            if previous is not None:
+                yield previous
+            if self.max_lines is not None and self.lines_read >= self.max_lines:
+                self.truncated = True
+                return
+            self.lines_read += 1
+            previous = line
+        if previous is not None:
+            if self.cut_mid_line:
+                self.lines_read -= 1
+            else:
+                yield previous
+
+    def iter_raw_chunks(self):
+        chunks = iter(self.chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            self.wait_seconds += time.perf_counter() - start
+            if chunk is None:
+                return
+            if self.deadline is not None:
+                # A slow host trickling bytes at us shouldn't be able to keep us here forever
+                self.deadline.check()
+            yield chunk
+
+    def iter_chunks(self):
+        chunks = decompress_chunks(self.iter_raw_chunks(), max_bytes=self.max_decompressed_bytes)
+        while True:
+            try:
+                chunk = next(chunks, None)
+            except EOFError:
+                # The compressed log was cut off before its end, whatever we got out of it is all there is
+                self.truncated = True
+                self.cut_mid_line = True
+                return
+            if chunk is None:
+                return
+            if not chunk:
+                continue
+            if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+                # Keep what fits, the partial last line gets dropped
+                chunk = chunk[:self.max_bytes - self.bytes_read]
+                self.bytes_read += len(chunk)
+                self.truncated = True
+                self.cut_mid_line = not chunk.endswith(b"\n")
+                if chunk:
+                    yield chunk
+                return
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+class ChunkReader(io.RawIOBase):
+    # Lets the decompressors read the chunks as they come in, the same way they'd read a file
+    def __init__(self, chunks, head=b""):
+        self.chunks = chunks
+        self.buffer = head
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.buffer:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.buffer = chunk
+        size = min(len(buffer), len(self.buffer))
+        buffer[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+def detect_compression(head):
+    for kind, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def open_decompressor(kind, reader):
+    # All of these carry on into the next member/stream, which is what you get from cat a.log.gz b.log.gz
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=reader)
+    if kind == "xz":
+        return lzma.LZMAFile(reader)
+    if zstandard is None:
+        raise CompressionError("zstd compressed logs aren't supported here, the zstandard package isn't installed")
+    return zstandard.ZstdDecompressor().stream_reader(reader, read_across_frames=True)
+
+
+def decompress_chunks(chunks, max_bytes=MAX_DECOMPRESSED_BYTES):
+    # Plain text goes straight through, anything compressed comes out decompressed a chunk at a time
+    chunks = iter(chunks)
+    head = b""
+    while len(head) < MAGIC_LENGTH:
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        head += chunk
+    kind = detect_compression(head)
+    if kind is None:
+        if head:
+            yield head
+        yield from chunks
+        return
+    decompressor = open_decompressor(kind, ChunkReader(chunks, head))
+    bytes_out = 0
+    while True:
+        try:
+            chunk = decompressor.read1(CHUNK_SIZE)
+        except DECOMPRESS_ERRORS as e:
+            raise CompressionError(f"Couldn't decompress the {kind} log: {e}") from e
+        if not chunk:
+            return
+        bytes_out += len(chunk)
+        if max_bytes is not None and bytes_out > max_bytes:
+            raise LogTooLargeError(f"Log is more than {max_bytes} bytes decompressed")
+        yield chunk
+
+
+def iter_text_lines(chunks, encoding="utf-8", max_line_length=MAX_LINE_LENGTH):
+    # Decodes the chunks as they come in and splits them the same way str.splitlines would
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    # The unfinished line, in pieces so a log without line breaks isn't joined back up on every chunk
+    parts = []
+    pending_length = 0
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if not text:
+            continue
+        if parts and not parts[-1].endswith("\r") and not has_line_break(text):
+            # Still the same line, past the longest we keep the rest of it is dropped
+            if pending_length < max_line_length:
+                parts.append(text)
+                pending_length += len(text)
+            continue
+        lines = ("".join(parts) + text).splitlines(keepends=True)
+        # The last piece isn't a full line yet, and a trailing \r might still be followed by a \n
+        last = lines[-1]
+        if last.endswith("\r") or strip_line_ending(last) == last:
+            parts = [lines.pop()]
+            pending_length = len(last)
+        else:
+            parts = []
+            pending_length = 0
+        for line in lines:
+            yield strip_line_ending(line)[:max_line_length]
+    text = "".join(parts) + decoder.decode(b"", final=True)
+    for line in text.splitlines():
+        yield line[:max_line_length]
+
+
+def has_line_break(text):
+    return any(line_break in text for line_break in LINE_BREAKS)
+
+
+def strip_line_ending(line):
+    if line.endswith("\r\n"):
+        return line[:-2]
+    if line.endswith("\n"):
+        return line[:-1]
+    stripped = line.splitlines()
+    return stripped[0] if stripped else ""
+
+
+def stream_response_lines(resp, max_lines=None, max_bytes=None, max_body_bytes=None, deadline=None):
+    # Don't bother downloading something that tells us up front it's too big
+    content_length = resp.headers.get("Content-Length")
+    if max_body_bytes is not None and content_length and content_length.isdigit() and int(content_length) > max_body_bytes:
+        resp.close()
+        raise LogTooLargeError(f"Log is {content_length} bytes, the limit is {max_body_bytes}")
+    return LineStream(resp.iter_content(chunk_size=CHUNK_SIZE), encoding=resp.encoding,
+                      max_lines=max_lines, max_bytes=max_bytes, deadline=deadline)
@@ -0,0 +1,49 @@
+import os
+import time
+import logging
+import threading
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# How many times the same message can be logged per window before we start dropping it
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", 10))
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", 60))
+
+
+class RateLimitFilter(logging.Filter):
+    # Keyed on the message before it's formatted, so "Couldn't reach %s" for a hundred different urls counts as one message
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            started, count, dropped = self.seen.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                if dropped:
+                    # Let whoever's reading know they missed some
+                    record.msg = f"{record.msg} ({dropped} more like this were dropped in the last {self.window:.0f}s)"
+                started, count, dropped = now, 0, 0
+            if count >= self.limit:
+                self.seen[key] = (started, count, dropped + 1)
+                return False
+            self.seen[key] = (started, count + 1, dropped)
+            return True
+
+
+def setup_logging():
+    logger = logging.getLogger("project")
+    if logger.handlers:
+        return logger
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    handler.addFilter(RateLimitFilter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    # gunicorn has its own handlers on the root logger, don't log everything twice
+    logger.propagate = False
+    return logger
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import logging
+from datetime import datetime as dt
+from .http_client import client
+from .constants import data_version_to_mc
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+# We keep a copy on disk too, it's what we fall back to if Mojang is down when we start
+MANIFEST_PATH = "project/static/mc_manifest.json"
+# How long we trust the manifest before asking Mojang if it's changed
+MANIFEST_MAX_AGE = int(os.environ.get("MANIFEST_MAX_AGE", 60 * 60))
+
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) ",
+    "Content-Type": "application/json",
+}
+
+
+def parse_release_time(release_time):
+    # "2023-03-14T12:56:18+00:00", fromisoformat is a lot quicker than strptime
+    return dt.fromisoformat(release_time)
+
+
+def build_data_versions(release_dates):
+    # Mojang's manifest doesn't have data versions, so it's our table with the release dates joined on
+    return {
+        data_version: {"mc_version": mc_version, "release_time": release_dates.get(mc_version)}
+        for data_version, mc_version in data_version_to_mc.items()
+    }
+
+
+class ManifestService:
+    def __init__(self, url=MANIFEST_URL, path=MANIFEST_PATH, max_age=MANIFEST_MAX_AGE):
+        self.url = url
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.manifest = None
+        self.etag = None
+        self.last_modified = None
+        self.checked_at = None
+        # Everything below is rebuilt once per manifest change so lookups are just dict gets
+        self.release_dates = {}
+        self.releases = []
+        # Usable before we've got a manifest, there just aren't any release dates yet
+        self.data_versions = build_data_versions({})
+
+    def is_stale(self):
+        return self.checked_at is None or time.monotonic() - self.checked_at > self.max_age
+
+    def get(self):
+        if self.is_stale():
+            with self.lock:
+                # Someone else might have refreshed while we waited on the lock
+                if self.is_stale():
+                    self.refresh()
+        return self.manifest
+
+    def refresh(self):
+        request_headers = dict(headers)
+        if self.manifest is not None:
+            # Only get the whole thing again if it's actually changed
+            if self.etag:
+                request_headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                request_headers["If-Modified-Since"] = self.last_modified
+        try:
+            resp = client.get(self.url, headers=request_headers)
+        except Exception as e:
+            logger.warning("Couldn't refresh the MC manifest: %s", e)
+            resp = None
+        if resp is not None and resp.status_code == 304:
+            self.checked_at = time.monotonic()
+            return
+        if resp is not None and resp.status_code == 200:
+            self.etag = resp.headers.get("ETag")
+            self.last_modified = resp.headers.get("Last-Modified")
+            self.load(resp.json())
+            self.save()
+            self.checked_at = time.monotonic()
+            return
+        if self.manifest is None:
+            # Better an old manifest than none at all
+            self.load_from_disk()
+        # Try again next time round rather than on every call
+        self.checked_at = time.monotonic()
+
+    def load(self, manifest):
+        release_dates = {}
+        for version in manifest["versions"]:
+            release_dates[version["id"]] = parse_release_time(version["releaseTime"])
+        releases = [version["id"] for version in manifest["versions"] if version["type"] == "release"]
+        releases.sort(key=lambda version: release_dates[version])
+        self.manifest = manifest
+        self.release_dates = release_dates
+        self.releases = releases
+        self.data_versions = build_data_versions(release_dates)
+
+    def save(self):
+        directory = os.path.dirname(self.path) or "."
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.manifest, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Couldn't save the MC manifest: %s", e)
+
+    def load_from_disk(self):
+        try:
+            with open(self.path, "r") as f:
+                self.load(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error("Couldn't load the MC manifest from disk: %s", e)
+
+    def get_mc_version(self, data_version):
+        # Just the index, this is called while parsing so it never waits on Mojang
+        entry = self.data_versions.get(int(data_version))
+        return entry["mc_version"] if entry is not None else None
+
+
+manifest_service = ManifestService()
@@ -0,0 +1,67 @@
+class LiteralMatcher:
+    # Works out which keys have one of their literals in a line.
+    # Lines get checked against the smallest set of literals that covers everything first, so the
+    # (very common) lines that can't match anything are thrown away after a handful of substring checks.
+    def __init__(self):
+        self.literals = []
+        self.compiled = False
+        self.prefilter = ()
+        self.prefilter_ignore_case = ()
+        self.dispatch = ()
+        self.dispatch_ignore_case = ()
+
+    def add(self, key, literals, ignore_case=False):
+        for literal in literals:
+            if ignore_case:
+                literal = literal.lower()
+            self.literals.append((literal, key, ignore_case))
+        self.compiled = False
+
+    def compile(self):
+        dispatch = {}
+        dispatch_ignore_case = {}
+        for literal, key, ignore_case in self.literals:
+            table = dispatch_ignore_case if ignore_case else dispatch
+            table.setdefault(literal, [])
+            if key not in table[literal]:
+                table[literal].append(key)
+        self.dispatch = tuple((literal, tuple(keys)) for literal, keys in dispatch.items())
+        self.dispatch_ignore_case = tuple((literal, tuple(keys)) for literal, keys in dispatch_ignore_case.items())
+        self.prefilter = reduce_literals(dispatch.keys())
+        self.prefilter_ignore_case = reduce_literals(dispatch_ignore_case.keys())
+        self.compiled = True
+
+    def match(self, line):
+        # Returns the set of keys that have at least one of their literals in the line
+        if not self.compiled:
+            self.compile()
+        found = None
+        for literal in self.prefilter:
+            if literal in line:
+                found = set()
+                for literal, keys in self.dispatch:
+                    if literal in line:
+                        found.update(keys)
+                break
+        if self.prefilter_ignore_case:
+            lowered = line.lower()
+            for literal in self.prefilter_ignore_case:
+                if literal in lowered:
+                    if found is None:
+                        found = set()
+                    for literal, keys in self.dispatch_ignore_case:
+                        if literal in lowered:
+                            found.update(keys)
+                    break
+        return found
+
+
+def reduce_literals(literals):
+    # If "Exception" is in a line then so might "CoercionFailedException" be, but if it isn't neither can be.
+    # So we only need to check the literals that don't contain another one to know if a line is worth a closer look.
+    literals = sorted(set(literals), key=len)
+    reduced = []
+    for literal in literals:
+        if not any(shorter in literal for shorter in reduced):
+            reduced.append(literal)
+    return tuple(reduced)
@@ -0,0 +1,116 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds, from a cached lookup up to a paste host taking its time
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Everything we export, in the order it shows up on /metrics
+registry = []
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")) for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # key -> [count per bucket..., +Inf count, sum]
+        self.values = {}
+        self.lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1) + [0.0]
+                self.values[key] = counts
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, counts in sorted(self.values.items()):
+                for i, bound in enumerate(self.buckets):
+                    lines.append(f"{self.name}_bucket{format_labels(self.labels, key, ('le', bound))} {counts[i]}")
+                total = counts[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, ('le', '+Inf'))} {total}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {counts[-1]}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, key)} {total}")
+        return lines
+
+
+def render():
+    # Prometheus text format, these are per worker like the thumbnail stats
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+request_seconds = Histogram("logparser_request_seconds", "Time spent handling a request", labels=("route", "status"))
+stage_seconds = Histogram("logparser_parse_stage_seconds", "Time spent in each stage of a parse", labels=("stage",))
+cache_requests = Counter("logparser_cache_requests_total", "Cache lookups by cache and outcome", labels=("cache", "result"))
+
+
+def record_cache(cache, hit):
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class Timings:
+    # Durations for one request's stages, they go to the histograms as they're recorded and to the Server-Timing header at the end
+    def __init__(self):
+        self.durations = {}
+
+    def add(self, stage, seconds):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+        stage_seconds.observe(seconds, stage=stage)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def server_timing(self):
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.durations.items())
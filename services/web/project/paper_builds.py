@@ -0,0 +1,161 @@
+import os
+import re
+import asyncio
+import time
+import threading
+import logging
+from concurrent.futures import Future
+from .http_client import client
+from .store import SqliteCache, MISSING, run_in_thread
+
+logger = logging.getLogger(__name__)
+
+# Builds older than this get refreshed in the background, we keep serving the old one until that's done
+REFRESH_AFTER = int(os.environ.get("PAPER_BUILD_REFRESH_AFTER", 25 * 60))
+# Past this a build is too old to serve at all and we'll wait on the API for a new one
+MAX_AGE = int(os.environ.get("PAPER_BUILD_MAX_AGE", 6 * 60 * 60))
+# How long a worker gets to refresh a version before another one is allowed to try
+LEASE_TIME = 30
+# How long we'll wait on another worker's fetch before doing it ourselves
+LEASE_WAIT = 5
+
+headers = {
+    "User-Agent": "Minecraft Latest.log Parser v1"
+}
+release_regex = re.compile(r"^\d+\.\d+(\.\d+)?$")
+
+builds = SqliteCache("paper_builds")
+leases = SqliteCache("paper_build_leases")
+
+# Fetches running in this process, so concurrent requests for a version share one
+in_flight = {}
+in_flight_lock = threading.Lock()
+# Same again for the async path, those all live on the one event loop so they don't need a lock
+async_in_flight = {}
+
+
+def get_api_url(mc_version):
+    return f"https://api.papermc.io/v2/projects/paper/versions/{mc_version}"
+
+
+def fetch_latest_build(mc_version):
+    resp = client.get(get_api_url(mc_version), headers=headers)
+    return read_build_response(resp)
+
+
+def read_build_response(resp):
+    if resp.status_code == 200:
+        # Get the json
+        data = resp.json()
+        # Get the last element in the "builds" list
+        return data["builds"][-1]
+    return None
+
+
+def refresh(mc_version):
+    # Only one worker should be hitting the API for a version at a time
+    leased = leases.add(mc_version, os.getpid(), ttl=LEASE_TIME)
+    if not leased:
+        # Someone else is on it, give them a moment before we go ourselves
+        waited = 0
+        while waited < LEASE_WAIT:
+            time.sleep(0.25)
+            waited += 0.25
+            cached = builds.get(mc_version, MISSING)
+            if cached is not MISSING and time.time() - cached["fetched_at"] < REFRESH_AFTER:
+                return cached["build"]
+    try:
+        build = fetch_latest_build(mc_version)
+        builds.set(mc_version, {"build": build, "fetched_at": time.time()}, ttl=MAX_AGE)
+        return build
+    finally:
+        if leased:
+            leases.delete(mc_version)
+
+
+def refresh_single_flight(mc_version):
+    # Returns a future for the version's refresh, joining one that's already running if there is one
+    with in_flight_lock:
+        future = in_flight.get(mc_version)
+        if future is not None:
+            return future, False
+        future = Future()
+        in_flight[mc_version] = future
+    return future, True
+
+
+def run_refresh(mc_version, future):
+    try:
+        future.set_result(refresh(mc_version))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        with in_flight_lock:
+            in_flight.pop(mc_version, None)
+
+
+def refresh_in_background(mc_version):
+    future, owner = refresh_single_flight(mc_version)
+    if owner:
+        threading.Thread(target=run_refresh, args=(mc_version, future), daemon=True).start()
+    return future
+
+
+def get_latest_build(mc_version):
+    if mc_version is None:
+        return None
+    cached = builds.get(mc_version, MISSING)
+    if cached is not MISSING:
+        if time.time() - cached["fetched_at"] >= REFRESH_AFTER:
+            # Stale, but still good enough to answer with while we fetch a fresh one
+            refresh_in_background(mc_version)
+        return cached["build"]
+    # Nothing we can serve, so we have to wait on the API
+    future, owner = refresh_single_flight(mc_version)
+    if owner:
+        run_refresh(mc_version, future)
+    return future.result()
+
+
+async def refresh_async(mc_version, async_client):
+    # No lease here, holding the event loop up waiting on another worker would defeat the point
+    resp = await async_client.get(get_api_url(mc_version), headers=headers)
+    build = read_build_response(resp)
+    await run_in_thread(builds.set, mc_version, {"build": build, "fetched_at": time.time()}, MAX_AGE)
+    return build
+
+
+async def get_latest_build_async(mc_version, async_client):
+    if mc_version is None:
+        return None
+    cached = await run_in_thread(builds.get, mc_version, MISSING)
+    if cached is not MISSING:
+        if time.time() - cached["fetched_at"] >= REFRESH_AFTER:
+            refresh_in_background(mc_version)
+        return cached["build"]
+    task = async_in_flight.get(mc_version)
+    if task is None:
+        task = asyncio.ensure_future(refresh_async(mc_version, async_client))
+        async_in_flight[mc_version] = task
+        task.add_done_callback(lambda _: async_in_flight.pop(mc_version, None))
+    # One request giving up shouldn't cancel the fetch for everyone else waiting on it
+    return await asyncio.shield(task)
+
+
+def warm(versions):
+    # Kick off fetches for any release versions we don't have a fresh build for yet
+    def run():
+        for mc_version in versions:
+            if not release_regex.match(mc_version):
+                continue
+            cached = builds.get(mc_version, MISSING)
+            if cached is not MISSING and time.time() - cached["fetched_at"] < REFRESH_AFTER:
+                continue
+            try:
+                refresh_in_background(mc_version).result()
+            except Exception as e:
+                logger.warning("Couldn't warm Paper build for %s: %s", mc_version, e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -1,76 +1,80 @@
-import sys
+import json
+import argparse
+import time
+import logging
 import requests
 import bs4
 import os
 import re
-from datetime import datetime as dt, timedelta
-from colorama import Fore
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urlparse
-from .constants import data_version_to_mc
-
-# We'll do some in-memory caching here for various things
-latest_paper_versions = {}
-
-# Constants
-ambiguous_plugin_regex = r"\[(\d\d:\d\d:\d\d)\] \[Server thread/ERROR\]: \[ModernPluginLoadingStrategy\] Ambiguous plugin name '([^']+)' for files '([^']+)' and '([^']+)' in 'plugins/\.paper-remapped'"
-attempted_downgrade_regex = r".*java\.lang\.RuntimeException: Server attempted to load chunk saved with newer version of minecraft! (\d+) > (\d+)"
-malware1_regex = r"at Updater.a\(:\d+\)"
-bad_config_regex = r"(\[(.*?)\]|java\.lang\.([a-zA-Z]+))"
+from .manifest import manifest_service
+from .scanner import Scanner
+from .ingest import stream_response_lines, LineStream
+from .http_client import client, Deadline
+from .store import SqliteCache
+from . import paper_builds
+from . import result_store
+from .result_store import ContentHasher
+from .buffer import LogBuffer
+from .metrics import Timings
+from .results import AnalysisResult, result_fields
+from .reports import render_ansi
+from .plugins import Plugin, CRACKED, MALWARE
+from .rules import get_rules, PIRATED, IGNORED_EXCEPTION, DETECTION_CATEGORIES
+from .traces import TraceGrouper, TRACE_LITERALS, is_trace_continuation
+from .shards import SHARD_MIN_LINES, OFFLINE_LOOKAHEAD, find_shard_bounds, scan_shard, merge_shards
+from .pool import get_parse_pool, in_worker
+
+logger = logging.getLogger(__name__)
+
+# Player lookups are cached on disk so every worker shares them, keyed by UUID with the username playerdb gave us
+player_cache = SqliteCache("players", max_entries=int(os.environ.get("PLAYER_CACHE_MAX_ENTRIES", 100000)))
+PLAYER_CACHE_TTL = int(os.environ.get("PLAYER_CACHE_TTL", 7 * 24 * 60 * 60))
+# UUIDs playerdb doesn't know about get rechecked sooner
+PLAYER_CACHE_NEGATIVE_TTL = int(os.environ.get("PLAYER_CACHE_NEGATIVE_TTL", 60 * 60))
+
+# Constants, everything is compiled once here rather than on every line
+ambiguous_plugin_regex = re.compile(r"\[(\d\d:\d\d:\d\d)\] \[Server thread/ERROR\]: \[ModernPluginLoadingStrategy\] Ambiguous plugin name '([^']+)' for files '([^']+)' and '([^']+)' in 'plugins/\.paper-remapped'")
+attempted_downgrade_regex = re.compile(r"java\.lang\.RuntimeException: Server attempted to load chunk saved with newer version of minecraft! (\d+) > (\d+)")
+bad_config_regex = re.compile(r"(\[(.*?)\]|java\.lang\.([a-zA-Z]+))")
+server_plugin_regex = re.compile(r"\[(.*)\](?:|:) Loading server plugin (.*) v(.*)")
+plugin_regex = re.compile(r"\[(.*)\] Loading (.*) v(.*)")
+player_regex = re.compile(r"UUID of player (.*) is (.*)")
+paper_build_regex = re.compile(r"git-Paper-(\d+)")
+paper_version_regex = re.compile(r"Paper version \d+\.\d+\.\d+-(\d+)-(master|main)")
 
 
 def get_mc_from_data_version(data_version):
-    try:
-        return data_version_to_mc[int(data_version)]
-    except KeyError:
-        return data_version
-
-
-class Plugin:
-    def __init__(self, name, version):
-        self.name = name
-        self.version = version
-        self.bad_plugins = [
-            "SkinsRestorer",
-            "AuthMe",
-            "nLogin",
-            "ClearLagg",
-            "FastClearLag",
-            "PlugMan",
-            "Skript"
-        ]
-        self.meh_plugins = [
-            "ViaVersion",
-            "ProtocolLib",
-            "ViaBackwards",
-            "ViaRewind"
-        ]
-
-    def __str__(self):
-        return f"{self.name} v{self.version}"
+    mc_version = manifest_service.get_mc_version(data_version)
+    return mc_version if mc_version is not None else data_version
 
-    def __repr__(self):
-        return f"{self.name} v{self.version}"
 
-    def get_version(self):
-        return self.version
+def get_playerdb_url(uuid):
+    return f"https://playerdb.co/api/player/minecraft/{uuid}"
 
-    def get_name(self):
-        return self.name
 
-    def get_color(self):
-        if self.name in self.bad_plugins:
-            return Fore.RED
-        elif self.name in self.meh_plugins:
-            return Fore.YELLOW
-        else:
-            return Fore.GREEN
+def analyze_shard(url, lines, start, lookahead):
+    # Runs in a parse worker, the line checks over one piece of a big log
+    return scan_shard(LogFile(url, use_result_store=False), lines, start, lookahead)
 
 
 class LogFile:
-    def __init__(self, url):
+    def __init__(self, url, use_result_store=True, timings=None):
         self.url = url
+        # Where the time went, by stage and by check
+        self.timings = timings if timings is not None else Timings()
+        # Reuse (and save) analyses from the shared result store
+        self.use_result_store = use_result_store
         self.host = ""
         self.max_lines = int(os.environ.get("MAX_LOG_LENGTH", 1000))
+        # How much of a log we're willing to download, anything past this is cut off
+        self.max_fetch_lines = int(os.environ.get("MAX_FETCH_LINES", 500000))
+        self.max_fetch_bytes = int(os.environ.get("MAX_FETCH_BYTES", 25 * 1024 * 1024))
+        # Logs claiming to be bigger than this aren't downloaded at all
+        self.max_body_bytes = int(os.environ.get("MAX_BODY_BYTES", 100 * 1024 * 1024))
+        # Logs at least this big are read into memory and scanned on every core instead of as they download
+        self.shard_min_bytes = int(os.environ.get("SHARD_MIN_BYTES", 16 * 1024 * 1024))
         self.headers = {
             "User-Agent": "Minecraft Latest.log Parser v1"
         }
@@ -80,54 +84,40 @@ class LogFile:
         self.plugins = []
         self.mc_version = None
         self.paper_version = None
+        self.latest_paper_version = None
         self.flavor = None
         self.flavor_line = None
         self.supported = False
         self.lines = []
+        self.line_count = 0
+        self.truncated = False
+        self.content_hash = None
         self.is_offline = False
-        self.weird_plugins = [
-            "AuthMe",
-            "nLogin",
-            "SkinsRestorer"
-        ]
+        self.offline_windows = []
         self.weird_plugins_acquired = []
         self.running_paper = False
         self.possibly_cracked = False
         self.has_pirated_plugins = False
         self.potentially_pirated_lines = []
-        self.pirate_giveaways = [
-            "BeastLeaks",
-            "leak",
-            "leaked",
-            "cracked",
-            "directleaks",
-            "blackspigot",
-            "spigotunlocked",
-            "nulled",
-            "mined.to"
-        ]
-        self.pirate_regexes = [
-            # Common leak message
-            r"\[\d{2}:\d{2}:\d{2}\] \[Server thread\/INFO\]: \[[\w]+\] \[[\w]+\] \[[\w]+\] Leaked by [\w]+ @ [A-Za-z.]+",
-            # [06:10:18] [Server thread/INFO]: [LifestealCore] [36m[Spigotunlocked.net] - COSMO
-            r"\[\d{2}:\d{2}:\d{2}\] \[Server thread\/INFO\]: \[[\w]+\] [36m\[Spigotunlocked\.net\] - [\w]+",
-            # Matches a "Downloaded from directleaks.*" message
-            r"\[\d{2}:\d{2}:\d{2}\] \[Server thread\/INFO\]: \[[\w]+\] Downloaded from (?:.*directleaks.*)"
-        ]
         self.has_missing_dependencies = False
         self.missing_dependencies = []
         self.has_exceptions = False
+        # One entry per distinct stack trace, with how many times it happened
         self.exceptions = []
-        self.ignored_exceptions = [
-            "UnknownDependencyException",
-            "CoercionFailedException"
-        ]
+        self.exception_count = 0
+        self.trace_grouper = TraceGrouper()
         self.has_ambiguous_plugins = False
         self.ambiguous_plugins = []
         self.attempting_to_downgrade = False
         self.downgraded_versions = []
         self.has_malware = False
         self.malware_count = 0
+        # Malware signatures, leak sites and ignored exceptions all come from the rules file
+        self.rules = get_rules()
+        # How far into the log each category of rule is looked for, unless the rule has its own max_lines
+        self.rule_windows = {PIRATED: self.max_lines + 1, MALWARE: self.max_lines + 2}
+        # Every rule that matched, with the line it was on
+        self.rule_matches = []
         self.invalid_config = False
         self.invalid_config_locations = []
         self.mock_config = ""
@@ -135,84 +125,283 @@ class LogFile:
         self.using_proxy = False
         self.players = []
         self.invalid_players = []
+        self.unverified_players = []
+        self.player_validation_concurrency = int(os.environ.get("PLAYER_VALIDATION_CONCURRENCY", 8))
+        # Seconds we'll spend validating players before giving up on the rest
+        self.player_validation_deadline = float(os.environ.get("PLAYER_VALIDATION_DEADLINE", 10))
 
     def run_checks(self):
+        if self.use_result_store:
+            with self.timings.stage("store"):
+                stored = result_store.get_by_url(self.url)
+            if stored is not None:
+                # We've done this url recently, no need to fetch or parse anything
+                self.load_stored_result(stored)
+                return
         self.get_host_from_url()
-        self.read_url_into_memory()
-        if len(self.lines) == 0:
+        # Every line based check runs from a single pass over the log, fed as it downloads
+        scanner = self.build_scanner()
+        self.stream_url_into(scanner)
+        if self.line_count == 0:
             return
-        self.get_flavor_line()
-        self.get_paper_version()
-        self.get_plugins()
-        self.check_for_ambiguous_plugin()
-        self.check_offline_mode()
-        self.check_for_weird_plugins()
-        self.check_for_paper()
-        self.check_possibly_cracked()
-        self.check_for_pirated_plugins()
-        self.check_for_mising_dependencies()
-        self.find_exceptions()
-        self.check_for_attempted_downgrade()
-        self.check_for_malware()
-        self.check_config()
-        self.get_players()
-        self.validate_players()
+        if self.use_result_store and self.load_from_store_by_hash():
+            return
+        self.analyze_scan()
+        self.run_lookups()
+
+    def run_checks_on_upload(self, upload):
+        # The same as run_checks for a log someone sent us themselves, there's no url to look up or fetch
+        scanner = self.build_scanner()
+        self.stream_upload_into(scanner, upload)
+        if self.line_count == 0:
+            return
+        if self.load_from_store_by_hash():
+            return
+        self.analyze_scan()
+        self.run_lookups()
+        if len(self.unverified_players) > 0:
+            # The share link needs something to point at, even if some players couldn't be checked this time
+            with self.timings.stage("store"):
+                result_store.put(self.url, self.content_hash, self.to_dict())
+
+    def load_from_store_by_hash(self):
+        with self.timings.stage("store"):
+            stored = result_store.get_reusable_by_hash(self.content_hash)
+        if stored is None:
+            return False
+        # Same log as one we've already done, maybe from another paste site, so skip the player lookups
+        self.load_stored_result(stored)
+        result_store.remember_url(self.url, self.content_hash)
+        return True
+
+    def analyze_scan(self):
+        # Works off what the scanner found, no network needed
+        with self.timings.stage("analyze"):
+            self.get_paper_version()
+            self.check_for_weird_plugins()
+            self.check_for_malware_plugins()
+            self.check_for_paper()
+            self.check_possibly_cracked()
+
+    def run_lookups(self):
+        self.latest_paper_version = self.get_latest_paper_version()
+        with self.timings.stage("players"):
+            self.validate_players()
+        # Players we couldn't get to are worth another try next time
+        if self.use_result_store and len(self.unverified_players) == 0:
+            with self.timings.stage("store"):
+                result_store.put(self.url, self.content_hash, self.to_dict())
+
+    def get_result(self):
+        return AnalysisResult.from_log_file(self)
+
+    def to_dict(self):
+        return self.get_result().to_dict()
+
+    def load_dict(self, data):
+        for field in result_fields:
+            if field in data:
+                setattr(self, field, data[field])
+        self.plugins = [Plugin(name, version) for name, version in data.get("plugins", [])]
+        self.weird_plugins_acquired = [Plugin(name, version) for name, version in data.get("weird_plugins_acquired", [])]
+
+    def load_stored_result(self, data):
+        self.load_dict(data)
+        # The stored build might be out of date by now, the build cache is cheap to ask
+        self.latest_paper_version = self.get_latest_paper_version()
+
+    def line_checks(self):
+        # The max lines mirror how far each check used to look when they all looped on their own
+        # Literals are what a line has to contain for the check to care about it, every other line is skipped
+        return [
+            {"name": "flavor_line", "callback": self.scan_flavor_line, "max_lines": self.max_lines + 1,
+             "literals": ["This server is running"]},
+            {"name": "plugins", "callback": self.scan_plugin_line, "max_lines": self.max_lines + 1,
+             "stop_on": "Preparing level", "literals": ["Loading"]},
+            {"name": "ambiguous_plugins", "callback": self.scan_ambiguous_plugin_line, "max_lines": self.max_lines + 2,
+             "literals": ["Ambiguous plugin name"]},
+            {"name": "offline_mode", "callback": self.scan_offline_mode_line, "on_finish": self.finish_offline_mode,
+             "literals": ["SERVER IS RUNNING IN OFFLINE/INSECURE MODE!", "BungeeCord", "Velocity"]},
+            self.rules_check(),
+            {"name": "missing_dependencies", "callback": self.scan_missing_dependency_line, "max_lines": self.max_lines + 1,
+             "literals": ["org.bukkit.plugin.UnknownDependencyException"]},
+            {"name": "exceptions", "callback": self.scan_exception_line, "on_finish": self.finish_exceptions,
+             "max_lines": self.max_lines + 2, "literals": ["Exception"] + TRACE_LITERALS},
+            {"name": "attempted_downgrade", "callback": self.scan_attempted_downgrade_line, "max_lines": self.max_lines + 2,
+             "literals": ["Server attempted to load chunk saved with newer version of minecraft!"]},
+            {"name": "config", "callback": self.scan_config_line, "max_lines": self.max_lines + 2,
+             "literals": ["org.spongepowered.configurate.serialize.CoercionFailedException"]},
+            {"name": "players", "callback": self.scan_player_line, "literals": ["UUID of player "]},
+        ]
+
+    def rules_check(self):
+        # Malware and leak site rules, the exceptions check looks up the ignored exceptions itself
+        rules = [rule for rule in self.rules if rule.category in DETECTION_CATEGORIES]
+        windows = [self.get_rule_window(rule) for rule in rules]
+        check = {"name": "rules", "callback": self.scan_rule_line,
+                 "max_lines": None if None in windows else max(windows, default=0)}
+        if all(rule.has_literals() for rule in rules):
+            check["literals"] = [literal for rule in rules for literal in rule.literals]
+            check["literals_ignore_case"] = [literal for rule in rules for literal in rule.literals_ignore_case]
+        return check
+
+    def build_scanner(self, names=None):
+        scanner = Scanner()
+        for check in self.line_checks():
+            if names is None or check["name"] in names:
+                scanner.register(**check)
+        return scanner
+
+    def run_line_checks(self, names=None):
+        scanner = self.build_scanner(names)
+        return scanner.scan(self.lines)
 
     def get_host_from_url(self):
         # Parse the host from the given url
         parsed = urlparse(self.url)
         self.host = parsed.netloc
 
-    def read_url_into_memory(self):
-        resp = None
+    def get_raw_url(self, deadline=None):
         match self.host:
             case "paste.gg":
                 if not self.url.endswith("raw"):
                     # WE need to use bs4 to get the raw url
-                    resp = requests.get(url=self.url, headers=self.headers)
-                    soup = bs4.BeautifulSoup(resp.text, "html.parser")
-                    raw_url = soup.find("a", {"class": "is-pulled-right button"}).get("href")
-                    # Now we can handle the raw url
-                    resp = requests.get(url=f"https://paste.gg{raw_url}", headers=self.headers)
-                else:
-                    # Already a raw url
-                    resp = requests.get(url=self.url, headers=self.headers)
+                    resp = client.get(self.url, headers=self.headers, deadline=deadline)
+                    return self.get_paste_gg_raw_url(resp.text)
+                # Already a raw url
+                return self.url
             case "pastes.dev":
                 # The raw url is just the url with api.pastes.dev
-                raw_url = self.url.replace("pastes.dev", "api.pastes.dev")
-                resp = requests.get(url=raw_url, headers=self.headers)
+                return self.url.replace("pastes.dev", "api.pastes.dev")
             case "api.pastes.dev":
                 # No need to get the raw url
-                resp = requests.get(url=self.url, headers=self.headers)
+                return self.url
             case "pastebin.com":
-                raw_url = self.url.replace("pastebin.com", "pastebin.com/raw")
-                resp = requests.get(url=raw_url, headers=self.headers)
+                return self.url.replace("pastebin.com", "pastebin.com/raw")
             case "mclo.gs":
                 # We'll want to get the ID of the logs, which is the last element of the url
                 id = self.url.split("/")[-1]
-                raw_url = f"https://api.mclo.gs/1/raw/{id}"
-                resp = requests.get(url=raw_url, headers=self.headers)
+                return f"https://api.mclo.gs/1/raw/{id}"
             case _:
                 # Not a site we support
-                self.lines = []
-                return ""
-        self.lines = resp.text.splitlines()
-        return resp.text
+                return None
+
+    def get_paste_gg_raw_url(self, page):
+        soup = bs4.BeautifulSoup(page, "html.parser")
+        raw_url = soup.find("a", {"class": "is-pulled-right button"}).get("href")
+        # Now we can handle the raw url
+        return f"https://paste.gg{raw_url}"
+
+    def open_log_stream(self):
+        # The raw url lookup, the request and the download itself all share one deadline
+        deadline = Deadline()
+        raw_url = self.get_raw_url(deadline)
+        if raw_url is None:
+            return None
+        resp = client.get(raw_url, headers=self.headers, deadline=deadline, stream=True)
+        return resp, stream_response_lines(resp, max_lines=self.max_fetch_lines, max_bytes=self.max_fetch_bytes,
+                                           max_body_bytes=self.max_body_bytes, deadline=deadline)
+
+    def stream_url_into(self, scanner):
+        # Feeds the log into the scanner as it downloads, we never hold the whole thing in memory
+        with self.timings.stage("fetch"):
+            opened = self.open_log_stream()
+        if opened is None:
+            return 0
+        resp, lines = opened
+        with resp:
+            content_length = resp.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) >= self.shard_min_bytes:
+                # Too much for one core, the shards get their own scanners
+                self.read_lines_into_memory(lines)
+                return self.scan_lines(self.lines)
+            return self.scan_stream(scanner, lines)
+
+    def stream_upload_into(self, scanner, upload):
+        lines = LineStream(upload.iter_chunks(), max_lines=self.max_fetch_lines, max_bytes=self.max_fetch_bytes)
+        if upload.size >= self.shard_min_bytes:
+            self.read_lines_into_memory(lines)
+            return self.scan_lines(self.lines)
+        return self.scan_stream(scanner, lines)
+
+    def scan_stream(self, scanner, lines):
+        start = time.perf_counter()
+        hasher = ContentHasher()
+        for line in lines:
+            hasher.update(line)
+            if not scanner.feed(line):
+                # Every check has what it needs, no point downloading the rest
+                break
+        scanner.finish()
+        # The download and the scan are interleaved, the time we spent waiting on chunks is the download's
+        self.timings.add("fetch", lines.wait_seconds)
+        self.timings.add("scan", time.perf_counter() - start - lines.wait_seconds)
+        self.record_check_timings(scanner)
+        self.line_count = scanner.line_count
+        self.truncated = lines.truncated
+        self.content_hash = hasher.hexdigest()
+        return self.line_count
+
+    def read_url_into_memory(self):
+        with self.timings.stage("fetch"):
+            opened = self.open_log_stream()
+        if opened is None:
+            self.lines = LogBuffer()
+            return self.lines
+        resp, lines = opened
+        with resp:
+            return self.read_lines_into_memory(lines)
+
+    def read_lines_into_memory(self, lines):
+        # Kept as one buffer with a line index, a str per line costs more than the text itself on most logs
+        hasher = ContentHasher()
+        self.lines = LogBuffer()
+        with self.timings.stage("fetch"):
+            self.lines.extend(lines)
+        # The buffer is every line encoded with a \n after it, the same thing the hasher would've been fed
+        hasher.update_raw(self.lines.raw())
+        self.line_count = len(self.lines)
+        self.truncated = lines.truncated
+        self.content_hash = hasher.hexdigest()
+        return self.lines
+
+    def scan_lines(self, lines):
+        # The same single pass as run_checks, over lines someone else already fetched
+        # Parse workers can't hand work on to the pool, so they always do it in one go
+        if len(lines) >= SHARD_MIN_LINES and not in_worker():
+            return self.scan_shards(lines)
+        scanner = self.build_scanner()
+        with self.timings.stage("scan"):
+            scanner.scan(lines)
+        self.record_check_timings(scanner)
+        self.line_count = scanner.line_count
+        return self.line_count
+
+    def scan_shards(self, lines):
+        # Each shard is scanned in its own process and the results put back together in log order
+        pool = get_parse_pool()
+        with self.timings.stage("shards"):
+            futures = [pool.submit(analyze_shard, self.url, lines[start:end], start, lines[end:end + OFFLINE_LOOKAHEAD])
+                       for start, end in find_shard_bounds(lines)]
+            merge_shards(self, [future.result() for future in futures])
+        return self.line_count
+
+    def record_check_timings(self, scanner):
+        for handler in scanner.handlers:
+            self.timings.add(f"check_{handler.name}", handler.seconds)
 
     def get_flavor_line(self):
-        # Iterate over the lines looking for: This server is running
+        self.run_line_checks(["flavor_line"])
+
+    def scan_flavor_line(self, i, line):
+        # Look for: This server is running
         # This should be within the first 30 lines
-        line_count = 0
-        for line in self.lines:
-            if "This server is running" in line:
-                # We've found the flavor line
-                self.flavor_line = line
-                self.get_mc_version()
-                self.get_server_flavor()
-                return
-            line_count += 1
-            if line_count > self.max_lines:
-                return
+        if "This server is running" in line:
+            # We've found the flavor line
+            self.flavor_line = line
+            self.get_mc_version()
+            self.get_server_flavor()
+            return True
 
     def get_mc_version(self):
         block = self.flavor_line.split("(Implementing API version ")[1]
@@ -228,11 +417,14 @@ class LogFile:
         return self.flavor
 
     def get_paper_version(self):
+        # Rotated logs don't have the startup lines, so there's nothing to go on
+        if self.flavor_line is None:
+            return None
         # Get the Flavor line and match against a regex string
-        match = re.search(r"git-Paper-(\d+)", self.flavor)
+        match = paper_build_regex.search(self.flavor)
         # Line: [16:38:57] [ServerMain/INFO]: [bootstrap] Loading Paper 1.21.1-26-master@52ae4ad (2024-08-16T22:44:55Z) for Minecraft 1.21.1
         # We want the 26 in the above example
-        match2 = re.search(r"Paper version \d+\.\d+\.\d+-(\d+)-(master|main)", self.flavor_line)
+        match2 = paper_version_regex.search(self.flavor_line)
         if match:
             try:
                 self.paper_version = int(match.group(1))
@@ -249,385 +441,336 @@ class LogFile:
         return self.paper_version
 
     def get_from_api(self):
-        api_url = f"https://api.papermc.io/v2/projects/paper/versions/{self.mc_version}"
-        resp = requests.get(url=api_url, headers=self.headers)
-        if resp.status_code == 200:
-            # Get the json
-            data = resp.json()
-            # Get the last element in the "builds" list
-            return data["builds"][-1]
-        return None
+        return paper_builds.fetch_latest_build(self.mc_version)
 
     def get_latest_paper_version(self):
-        # Check our latest_paper_versions dict for the latest version, if it's not there, get it
-        if self.mc_version not in latest_paper_versions:
-            print("Pulling from Paper API")
-            build = self.get_from_api()
-            if build:
-                # Add it to the dict
-                latest_paper_versions[self.mc_version] = {
-                    "build": build,
-                    "timestamp": dt.utcnow()
-                }
-                return build
-        else:
-            # It's in there so lets grab the object
-            build = latest_paper_versions[self.mc_version]
-            # Check the timestamp to see if it's older than 30 minutes
-            if build["timestamp"] < (dt.utcnow() - timedelta(minutes=30)):
-                print("Cache expired, getting new build")
-                # It's older than 30 minutes, so we need to get a new one
-                build = self.get_from_api()
-                if build:
-                    # Update the dict
-                    latest_paper_versions[self.mc_version] = {
-                        "build": build,
-                        "timestamp": dt.utcnow()
-                    }
-            print("Using cached build")
-            return latest_paper_versions[self.mc_version]["build"]
+        # Served from the shared build cache, which refreshes itself in the background before it goes stale
+        try:
+            with self.timings.stage("paper_api"):
+                return paper_builds.get_latest_build(self.mc_version)
+        except requests.RequestException as e:
+            logger.warning("Couldn't get the latest Paper build for %s: %s", self.mc_version, e)
+            return None
 
     def get_plugins(self):
-        # We want to iterate over the lines until we hit "Preparing level"
-        checked_lines = 0
-        for line in self.lines:
-            if "Preparing level" in line:
-                return
-            # Do a regex check on the line for "\[(.*)\] Loading (.*) v(.*)" and then grab the 2nd and 3rd group
-            if "server plugin" in line:
-                regex = re.compile("\[(.*)\](?:|:) Loading server plugin (.*) v(.*)")
-            else:
-                regex = re.compile("\[(.*)\] Loading (.*) v(.*)")
-            match = regex.search(line)
-            if match:
-                self.plugins.append(Plugin(match.group(2), match.group(3)))
-            checked_lines += 1
-            if checked_lines > self.max_lines:
-                return
+        # The scanner stops this check once we hit "Preparing level"
+        self.run_line_checks(["plugins"])
+
+    def scan_plugin_line(self, i, line):
+        # Do a regex check on the line for "\[(.*)\] Loading (.*) v(.*)" and then grab the 2nd and 3rd group
+        if "server plugin" in line:
+            regex = server_plugin_regex
+        else:
+            regex = plugin_regex
+        match = regex.search(line)
+        if match:
+            self.plugins.append(Plugin(match.group(2), match.group(3)))
 
     def check_offline_mode(self):
-        for i, line in enumerate(self.lines):
-            if "SERVER IS RUNNING IN OFFLINE/INSECURE MODE!" in line:
-                # Check the next 10 lines for a mention of BungeeCord or Velocity
-                for j in range(i, i + 10):
-                    if "BungeeCord" in self.lines[j]:
-                        self.proxy_flavor = "BungeeCord"
-                        self.using_proxy = True
-                        return False
-                    if "Velocity" in self.lines[j]:
-                        self.proxy_flavor = "Velocity"
-                        self.using_proxy = True
-                        return False
-                self.is_offline = True
+        self.run_line_checks(["offline_mode"])
         return False
 
+    def scan_offline_mode_line(self, i, line):
+        # Each offline warning opens a 10 line window (including itself) to look for BungeeCord or Velocity
+        self.expire_offline_windows(i)
+        if "SERVER IS RUNNING IN OFFLINE/INSECURE MODE!" in line:
+            self.offline_windows.append(i)
+        if not self.offline_windows:
+            return
+        if "BungeeCord" in line:
+            self.proxy_flavor = "BungeeCord"
+        elif "Velocity" in line:
+            self.proxy_flavor = "Velocity"
+        else:
+            return
+        self.using_proxy = True
+        self.offline_windows = []
+        return True
+
+    def expire_offline_windows(self, i):
+        # Any window that got through all 10 lines without a proxy means we really are offline
+        while self.offline_windows and self.offline_windows[0] + 10 <= i:
+            self.offline_windows.pop(0)
+            self.is_offline = True
+
+    def finish_offline_mode(self):
+        # The log ended before these windows were full, nothing in them mentioned a proxy
+        if self.offline_windows:
+            self.offline_windows = []
+            self.is_offline = True
+
     def check_for_weird_plugins(self):
         for plugin in self.plugins:
-            if plugin.get_name() in self.weird_plugins:
+            if plugin.is_a(CRACKED):
                 self.weird_plugins_acquired.append(plugin)
 
+    def check_for_malware_plugins(self):
+        for plugin in self.plugins:
+            if plugin.is_a(MALWARE):
+                self.has_malware = True
+                self.malware_count += 1
+
     def check_possibly_cracked(self):
         if len(self.weird_plugins_acquired) > 0:
             self.possibly_cracked = True
 
-    def print_plugins_for_report(self):
-        for plugin in self.plugins:
-            print(f"{plugin.get_color()}{plugin}{Fore.RESET}")
-        print(f"{Fore.GREEN}==============================")
-
-    def output_plugins_for_report(self):
-        output = []
-        for plugin in self.plugins:
-            output.append(f"{plugin.get_color()}{plugin}{Fore.RESET}")
-        output.append(f"{Fore.GREEN}==============================")
-        return output
-
     def check_for_paper(self):
+        if self.flavor is None:
+            return False
         if "Paper version" in self.flavor and "git-Paper" in self.flavor:
             self.running_paper = True
             return True
 
     def get_players(self):
+        self.run_line_checks(["players"])
+
+    def scan_player_line(self, i, line):
         # Line: [12:52:55] [User Authenticator #3/INFO]: UUID of player rexawais is 02dc6ed7-0704-493c-9616-d1952369623c
-        for line in self.lines:
-            # Check if the line matches the regex
-            match = re.search(r"UUID of player (.*) is (.*)", line)
-            if match:
-                player_info = {
-                    "username": match.group(1),
-                    "uuid": match.group(2)
-                }
-                # Add it to the list of players, if it's not already in there
-                if player_info not in self.players:
-                    self.players.append(player_info)
+        # Check if the line matches the regex
+        match = player_regex.search(line)
+        if match:
+            player_info = {
+                "username": match.group(1),
+                "uuid": match.group(2)
+            }
+            # Add it to the list of players, if it's not already in there
+            if player_info not in self.players:
+                self.players.append(player_info)
+
+    def lookup_cached_usernames(self, uuids):
+        # The usernames we already know, None for the UUIDs playerdb.co told us it doesn't know
+        return player_cache.get_many(uuids)
+
+    def request_player_username(self, uuid, deadline=None):
+        # Only the request, whoever asked reads it so the cache is never touched from the lookup threads
+        return client.get(get_playerdb_url(uuid), headers=self.headers, deadline=deadline)
+
+    def read_playerdb_responses(self, responses):
+        # The usernames from the responses we could make sense of, the rest are left unverified
+        usernames = {}
+        for uuid, resp in responses.items():
+            try:
+                usernames[uuid] = self.read_playerdb_response(uuid, resp)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Couldn't read playerdb's response for %s: %s", uuid, e)
+        return usernames
+
+    def read_playerdb_response(self, uuid, resp):
+        if resp.status_code == 200:
+            data = resp.json()
+            username = data["data"]["player"]["username"]
+            player_cache.set(uuid, username, ttl=PLAYER_CACHE_TTL)
+            return username
+        # Only remember the misses that are playerdb telling us no, not it having a bad time
+        if resp.status_code < 500 and resp.status_code != 429:
+            player_cache.set(uuid, None, ttl=PLAYER_CACHE_NEGATIVE_TTL)
+        return None
+
+    def check_player_username(self, player, username):
+        if username is None:
+            logger.debug("Player %s has an invalid UUID.", player['username'])
+            return False
+        # Check if the player username matches the username in the player info
+        if username != player["username"]:
+            logger.debug("Player %s has an invalid UUID. %s does not match %s", player['username'], player['uuid'], username)
+            return False
+        logger.debug("Player %s has a valid UUID. %s matches %s", player['username'], player['uuid'], username)
+        return True
 
     def validate_players(self):
+        if len(self.players) == 0:
+            return
+        deadline = Deadline(self.player_validation_deadline)
+        # Everyone we already know in one query from this thread, only the rest need asking about
+        usernames = self.lookup_cached_usernames([player["uuid"] for player in self.players])
+        uuids = list(dict.fromkeys(player["uuid"] for player in self.players if player["uuid"] not in usernames))
+        if len(uuids) > 0:
+            # Ask playerdb.co about the rest in parallel, anyone we don't hear back about in time is left unverified
+            pool = ThreadPoolExecutor(max_workers=min(self.player_validation_concurrency, len(uuids)))
+            futures = {uuid: pool.submit(self.request_player_username, uuid, deadline) for uuid in uuids}
+            done, _ = wait(futures.values(), timeout=max(deadline.remaining(), 0))
+            # Don't hold the request up waiting on stragglers
+            pool.shutdown(wait=False, cancel_futures=True)
+            responses = {uuid: future.result() for uuid, future in futures.items() if future in done and future.exception() is None}
+            usernames.update(self.read_playerdb_responses(responses))
         for player in self.players:
-            # Check against playerdb.co
-            url = f"https://playerdb.co/api/player/minecraft/{player['uuid']}"
-            resp = requests.get(url, headers=self.headers)
-            if resp.status_code == 200:
-                data = resp.json()
-                data = data["data"]["player"]
-                # Check if the player username matches the username in the player info
-                if data["username"] != player["username"]:
-                    print(f"{Fore.RED}Player {player['username']} has an invalid UUID. {player['uuid']} does not match {data['username']}{Fore.RESET}")
-                    self.invalid_players.append(player)
-                else:
-                    print(f"{Fore.GREEN}Player {player['username']} has a valid UUID. {player['uuid']} matches {data['username']}{Fore.RESET}")
-            else:
-                print(f"{Fore.RED}Player {player['username']} has an invalid UUID.{Fore.RESET}")
+            if player["uuid"] not in usernames:
+                self.unverified_players.append(player)
+            elif not self.check_player_username(player, usernames[player["uuid"]]):
                 self.invalid_players.append(player)
 
     def check_for_pirated_plugins(self):
-        lines_checked = 0
-        for line in self.lines:
-            # Search through our multiple regexes
-            matches = False
-            for regex in self.pirate_regexes:
-                matches = re.search(regex, line)
-                if matches:
-                    break
-            if matches:
-                self.potentially_pirated_lines.append(matches[0])
-                self.has_pirated_plugins = True
-            elif any(word in line.lower() for word in self.pirate_giveaways) and "STDOUT" in line:
-                self.potentially_pirated_lines.append(line)
+        self.run_line_checks(["rules"])
+
+    def get_rule_window(self, rule):
+        if rule.max_lines is not None:
+            return rule.max_lines
+        return self.rule_windows.get(rule.category)
+
+    def scan_rule_line(self, i, line):
+        # Each category counts a line once, whichever of its rules matched first
+        counted = set()
+        for rule, matched in self.rules.matches(line, DETECTION_CATEGORIES):
+            window = self.get_rule_window(rule)
+            if window is not None and i >= window:
+                continue
+            self.rule_matches.append({"rule": rule.name, "category": rule.category, "severity": rule.severity, "line_number": i})
+            if rule.category in counted:
+                continue
+            counted.add(rule.category)
+            if rule.category == MALWARE:
+                self.has_malware = True
+                self.malware_count += 1
+            elif rule.category == PIRATED:
+                self.potentially_pirated_lines.append(matched)
                 self.has_pirated_plugins = True
-            lines_checked += 1
-            if lines_checked > self.max_lines:
-                return
 
     def check_for_mising_dependencies(self):
-        # Iterate over the lines looking for lines containing "org.bukkit.plugin.UnknownDependencyException"
-        lines_checked = 0
-        for line in self.lines:
-            if "org.bukkit.plugin.UnknownDependencyException" in line:
-                self.has_missing_dependencies = True
-                # Get the list of missing dependencies
-                dependencies = line.split("Unknown/missing dependency plugins: ")[1].split(".")[0]
-                # Remove brackets from the dependencies
-                dependencies = dependencies.replace("[", "").replace("]", "")
-                # Split the dependencies by comma, if no comma, then it's just one dependency
-                if "," in dependencies:
-                    found_dependencies = dependencies.split(",")
-                    self.missing_dependencies.append(found_dependencies)
-                else:
-                    self.missing_dependencies.append(dependencies)
-            lines_checked += 1
-            if lines_checked > self.max_lines:
-                return
+        self.run_line_checks(["missing_dependencies"])
+
+    def scan_missing_dependency_line(self, i, line):
+        # Look for lines containing "org.bukkit.plugin.UnknownDependencyException"
+        if "org.bukkit.plugin.UnknownDependencyException" in line:
+            self.has_missing_dependencies = True
+            # Get the list of missing dependencies
+            dependencies = line.split("Unknown/missing dependency plugins: ")[1].split(".")[0]
+            # Remove brackets from the dependencies
+            dependencies = dependencies.replace("[", "").replace("]", "")
+            # Split the dependencies by comma, if no comma, then it's just one dependency
+            if "," in dependencies:
+                found_dependencies = dependencies.split(",")
+                self.missing_dependencies.append(found_dependencies)
+            else:
+                self.missing_dependencies.append(dependencies)
 
     def find_exceptions(self):
-        # Iterate over lines and keep an index
-        for i, line in enumerate(self.lines):
-            if "Exception" in line and "lost connection" not in line:
-                # Ensure it's not in our ignored exceptions list
-                if any(word in line for word in self.ignored_exceptions):
-                    continue
-                self.has_exceptions = True
-                self.exceptions.append({
-                    "line": line,
-                    "line_number": i
-                })
-            if i > self.max_lines:
+        self.run_line_checks(["exceptions"])
+
+    def scan_exception_line(self, i, line):
+        # Frames right after an exception are part of it
+        if is_trace_continuation(line) and self.trace_grouper.add_continuation(i, line):
+            return
+        if "Exception" in line and "lost connection" not in line:
+            # Ensure it's not one the rules say to ignore
+            if self.rules.first_match(line, IGNORED_EXCEPTION) is not None:
                 return
+            self.has_exceptions = True
+            self.trace_grouper.add_header(i, line)
+
+    def finish_exceptions(self):
+        self.exceptions = self.trace_grouper.finish()
+        self.exception_count = self.trace_grouper.total
 
     def check_for_ambiguous_plugin(self):
-        for i, line in enumerate(self.lines):
-            if "Ambiguous plugin name" in line:
-                self.has_ambiguous_plugins = True
-                # Parse out the plugin name
-                matches = re.search(ambiguous_plugin_regex, line)
-                if matches:
-                    # The 2nd match is the plugin name
-                    plugin_name = matches.group(2)
-                    # The 3rd, and onward matches are the filenames of the plugins
-                    plugin_filenames = [plugin for plugin in matches.groups()[2:] if plugin is not None]
-                    self.ambiguous_plugins.append({
-                        "plugin_name": plugin_name,
-                        "plugin_filenames": plugin_filenames
-                    })
-            if i > self.max_lines:
-                return
+        self.run_line_checks(["ambiguous_plugins"])
+
+    def scan_ambiguous_plugin_line(self, i, line):
+        if "Ambiguous plugin name" in line:
+            self.has_ambiguous_plugins = True
+            # Parse out the plugin name
+            matches = ambiguous_plugin_regex.search(line)
+            if matches:
+                # The 2nd match is the plugin name
+                plugin_name = matches.group(2)
+                # The 3rd, and onward matches are the filenames of the plugins
+                plugin_filenames = [plugin for plugin in matches.groups()[2:] if plugin is not None]
+                self.ambiguous_plugins.append({
+                    "plugin_name": plugin_name,
+                    "plugin_filenames": plugin_filenames
+                })
 
     def check_for_attempted_downgrade(self):
-        for i, line in enumerate(self.lines):
-            match = re.search(attempted_downgrade_regex, line)
-            if match:
-                self.attempting_to_downgrade = True
-                version1 = match.group(1)
-                version2 = match.group(2)
-                self.downgraded_versions = [get_mc_from_data_version(version1), get_mc_from_data_version(version2)]
-            if i > self.max_lines:
-                return
+        self.run_line_checks(["attempted_downgrade"])
+
+    def scan_attempted_downgrade_line(self, i, line):
+        match = attempted_downgrade_regex.search(line)
+        if match:
+            self.attempting_to_downgrade = True
+            version1 = match.group(1)
+            version2 = match.group(2)
+            self.downgraded_versions = [get_mc_from_data_version(version1), get_mc_from_data_version(version2)]
 
     def check_for_malware(self):
-        # Scan the entire log for any matches of the malware regex
-        for i, line in enumerate(self.lines):
-            if re.search(malware1_regex, line):
-                self.has_malware = True
-                self.malware_count += 1
-            if i > self.max_lines:
-                return
+        self.run_line_checks(["rules"])
 
     def check_config(self):
-        # Scan the logs for a line starting with org.spongepowered.configurate.serialize.CoercionFailedException
-        for i, line in enumerate(self.lines):
-            if "org.spongepowered.configurate.serialize.CoercionFailedException" in line:
-                self.invalid_config = True
-                # Pull out our needed information from the line
-                matches = re.findall(bad_config_regex, line)
-                # Our first match will be where in the config the error is
-                config_location = matches[0][1].split(", ")
-                self.invalid_config_locations = config_location
-                valid_type = matches[1][2]
-                invalid_type = matches[2][2]
-                # We want to make a mock config to show the user
-                # We'll start with the config location
-                mock_config = f"{Fore.WHITE}"
-                # For each location in the config it's a new json object
-                for loc_i, location in enumerate(config_location):
-                    # If it's the first location, we don't need to add a comma
-                    if loc_i == 0:
-                        mock_config += f'"{location}": {{'
-                    elif loc_i == len(config_location) - 1:
-                        # Last location, this is out invalid value
-                        mock_config += f'\n{" " * (loc_i * 4)}"{location}": '
-                    else:
-                        mock_config += f'\n{" " * (loc_i * 4)}"{location}": {{'
-                match invalid_type:
-                    case "String":
-                        mock_config += f'"{invalid_type}"'
-                    case "Integer":
-                        mock_config += f"{invalid_type}"
-                    case "Boolean":
-                        mock_config += f"{invalid_type}"
-                    case _:
-                        mock_config += f'"{invalid_type}"'
-                # Add a cool arrow to show where the error is
-                mock_config += f", <-- {Fore.RED}ERROR"
-                # Add the valid type
-                mock_config += f" (should be {valid_type}){Fore.RESET}"
-                # Close out the json objects, loop through the config location backwards
-                for loc_i, location in enumerate(config_location[::-1]):
-                    # Our first element should be the trouble maker, so we don't need to close it
-                    if loc_i == 0:
-                        continue
-                    # We need to indent by the number of locations we have, minus the current location
-                    mock_config += f'\n{" " * ((len(config_location) - (loc_i + 1)) * 4)}}}'
-
-                self.mock_config = mock_config
-                return
+        self.run_line_checks(["config"])
+
+    def scan_config_line(self, i, line):
+        # Look for a line starting with org.spongepowered.configurate.serialize.CoercionFailedException
+        if "org.spongepowered.configurate.serialize.CoercionFailedException" in line:
+            self.invalid_config = True
+            # Pull out our needed information from the line
+            matches = bad_config_regex.findall(line)
+            # Our first match will be where in the config the error is
+            config_location = matches[0][1].split(", ")
+            self.invalid_config_locations = config_location
+            valid_type = matches[1][2]
+            invalid_type = matches[2][2]
+            # We want to make a mock config to show the user
+            # We'll start with the config location
+            mock_config = ""
+            # For each location in the config it's a new json object
+            for loc_i, location in enumerate(config_location):
+                # If it's the first location, we don't need to add a comma
+                if loc_i == 0:
+                    mock_config += f'"{location}": {{'
+                elif loc_i == len(config_location) - 1:
+                    # Last location, this is out invalid value
+                    mock_config += f'\n{" " * (loc_i * 4)}"{location}": '
+                else:
+                    mock_config += f'\n{" " * (loc_i * 4)}"{location}": {{'
+            match invalid_type:
+                case "String":
+                    mock_config += f'"{invalid_type}"'
+                case "Integer":
+                    mock_config += f"{invalid_type}"
+                case "Boolean":
+                    mock_config += f"{invalid_type}"
+                case _:
+                    mock_config += f'"{invalid_type}"'
+            # Add a cool arrow to show where the error is
+            mock_config += ", <-- ERROR"
+            # Add the valid type
+            mock_config += f" (should be {valid_type})"
+            # Close out the json objects, loop through the config location backwards
+            for loc_i, location in enumerate(config_location[::-1]):
+                # Our first element should be the trouble maker, so we don't need to close it
+                if loc_i == 0:
+                    continue
+                # We need to indent by the number of locations we have, minus the current location
+                mock_config += f'\n{" " * ((len(config_location) - (loc_i + 1)) * 4)}}}'
 
-            if i > self.max_lines:
-                return
+            self.mock_config = mock_config
+            # We only care about the first bad config
+            return True
 
     def print_report(self):
-        color = Fore.GREEN if self.supported else Fore.RED
-        print(f"{color}Minecraft Version: {self.mc_version}{Fore.RESET}")
-        color = Fore.GREEN if self.running_paper else Fore.RED
-        print(f"{color}Server Flavor: {self.flavor}{Fore.RESET}")
-        color = Fore.GREEN if not self.is_offline else Fore.RED
-        print(f"{color}Offline Mode: {self.is_offline}{Fore.RESET}")
-        print(f"{Fore.GREEN}============PLUGINS============")
-        self.print_plugins_for_report()
-        if self.has_ambiguous_plugins:
-            print(f"{Fore.YELLOW}==========AMBIGUOUS PLUGINS==========")
-            for plugin in self.ambiguous_plugins:
-                print(f"{Fore.YELLOW}Plugin Name: {plugin['plugin_name']}")
-                print(f"{Fore.YELLOW}Plugin Filenames: {plugin['plugin_filenames']}")
-        if self.possibly_cracked:
-            print(f"{Fore.CYAN}Server is possibly cracked. The following plugins suggest this: ")
-            for plugin in self.weird_plugins_acquired:
-                print(f"{plugin.get_color()}{plugin}{Fore.RESET}")
-            print(f"{Fore.GREEN}==============================")
-        if self.has_pirated_plugins:
-            print(f"{Fore.CYAN}Server has pirated plugins. The following lines suggest this: ")
-            for line in self.potentially_pirated_lines:
-                print(f"{Fore.CYAN}{line}{Fore.RESET}")
-            print(f"{Fore.GREEN}==============================")
-        if self.has_missing_dependencies:
-            print(f"{Fore.CYAN}Server has missing dependencies. The following dependencies are missing: ")
-            for dependency in self.missing_dependencies:
-                print(f"{Fore.CYAN}{dependency}{Fore.RESET}")
-            print(f"{Fore.GREEN}==============================")
-        if self.has_exceptions:
-            print(f"{Fore.CYAN}Server has exceptions. The following exceptions were found: ")
-            for exception in self.exceptions:
-                print(f"{Fore.CYAN}Line {exception['line_number']}: {exception['line']}{Fore.RESET}")
-            print(f"{Fore.GREEN}==============================")
+        for line in render_ansi(self.get_result()):
+            print(line)
 
     def get_report_as_string(self):
-        output = []
-        color = Fore.GREEN if self.supported else Fore.REDz
-        output.append(f"{color}Minecraft Version: {self.mc_version}{Fore.RESET}")
-        color = Fore.GREEN if self.running_paper else Fore.RED
-        output.append(f"{color}Server Flavor: {self.flavor}{Fore.RESET}")
-        color = Fore.GREEN if self.paper_version == self.get_latest_paper_version() else Fore.RED
-        output.append(f"{color}Paper Version: {self.paper_version}{Fore.RESET}")
-        color = Fore.GREEN if not self.is_offline else Fore.RED
-        output.append(f"{color}Offline Mode: {self.is_offline}{Fore.RESET}")
-        color = Fore.GREEN if not self.has_malware else Fore.RED
-        if self.using_proxy:
-            output.append(f"{Fore.CYAN}Using {self.proxy_flavor} proxy")
-        output.append(f"{color}Malware Detected: {self.has_malware}{Fore.RESET}")
-        if self.attempting_to_downgrade:
-            output.append(
-                f"{Fore.RED}Server is attempting to downgrade. This is not supported! You're going from {self.downgraded_versions[0]} to {self.downgraded_versions[1]}{Fore.RESET}")
-        if len(self.invalid_players) > 0:
-            output.append(f"{Fore.RED}=============================={Fore.RESET}")
-            output.append(f"{Fore.RED}The following players have invalid UUIDs: {Fore.RESET}")
-            for player in self.invalid_players:
-                output.append(f"{Fore.RED}{player['username']} - {player['uuid']}{Fore.RESET}")
-            output.append(f"{Fore.RED}These UUIDs either do not exist, or are for different usernames.{Fore.RESET}")
-        output.append(f"{Fore.GREEN}============PLUGINS============{Fore.RESET}")
-        for line in self.output_plugins_for_report():
-            output.append(line)
-        if self.has_ambiguous_plugins:
-            # Get rid of the last line in the output
-            output.pop()
-            output.append(f"{Fore.YELLOW}==========AMBIGUOUS PLUGINS=========={Fore.RESET}")
-            for plugin in self.ambiguous_plugins:
-                output.append(f"{Fore.YELLOW}Plugin Name: {plugin['plugin_name']}")
-                output.append(f"{Fore.YELLOW}Plugin Filenames: {plugin['plugin_filenames']}")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        if self.has_missing_dependencies:
-            output.append(
-                f"{Fore.CYAN}Server has missing dependencies. The following dependencies are missing: {Fore.RESET}")
-            for dependency in self.missing_dependencies:
-                output.append(f"{Fore.CYAN}{dependency}{Fore.RESET}")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        if self.possibly_cracked:
-            output.append(f"{Fore.CYAN}Server is possibly cracked. The following plugins suggest this: {Fore.RESET}")
-            for plugin in self.weird_plugins_acquired:
-                output.append(f"{plugin.get_color()}{plugin}{Fore.RESET}")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        if self.has_pirated_plugins:
-            output.append(f"{Fore.CYAN}Server has pirated plugins. The following lines suggest this: {Fore.RESET}")
-            for line in self.potentially_pirated_lines:
-                output.append(f"{Fore.CYAN}{line}{Fore.RESET}")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        if self.has_exceptions:
-            output.append(f"{Fore.CYAN}Server has exceptions. The following exceptions were found: {Fore.RESET}")
-            for exception in self.exceptions:
-                output.append(
-                    f"{Fore.CYAN}Line {exception['line_number']}: {Fore.YELLOW}{exception['line']}{Fore.RESET}")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        if self.invalid_config:
-            output.append(f"{Fore.RED}Server has an invalid config. Use the following info to fix it! {Fore.RESET}")
-            output.append(self.mock_config)
-            output.append(f"{Fore.YELLOW}You should find lines like look like this in your Paper configs.")
-            output.append(f"{Fore.GREEN}=============================={Fore.RESET}")
-        return output
+        return render_ansi(self.get_result())
 
 
 def main():
-    # Get first args
-    url = sys.argv[1]
-    log = LogFile(url)
+    arg_parser = argparse.ArgumentParser(description="Checks a Minecraft server log for common problems")
+    arg_parser.add_argument("log", help="The log's url, or with --follow the path to a log file")
+    arg_parser.add_argument("--follow", action="store_true", help="Keep watching a local log file and print what's new as it's written")
+    arg_parser.add_argument("--interval", type=float, default=None, help="Seconds between checks for new lines when following")
+    arg_parser.add_argument("--json", action="store_true", help="Print JSON instead of the coloured report")
+    args = arg_parser.parse_args()
+    if args.follow:
+        # follow builds on LogFile, so it can only be imported once we're done defining it
+        from .follow import follow, FOLLOW_INTERVAL
+        follow(args.log, interval=args.interval or FOLLOW_INTERVAL, as_json=args.json)
+        return
+    log = LogFile(args.log)
     log.run_checks()
-    log.print_report()
+    if args.json:
+        print(json.dumps(log.to_dict()))
+    else:
+        log.print_report()
 
 
 if __name__ == "__main__":
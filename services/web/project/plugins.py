@@ -0,0 +1,89 @@
+import os
+import json
+
+PLUGIN_DATA_PATH = os.environ.get("PLUGIN_DATA_PATH", os.path.join(os.path.dirname(__file__), "data", "plugins.json"))
+
+BAD = "bad"
+MEH = "meh"
+# Plugins you only really need on an offline mode server
+CRACKED = "cracked"
+# Plugins that are known to ship with malware in them
+MALWARE = "malware"
+CATEGORIES = (BAD, MEH, CRACKED, MALWARE)
+NO_CATEGORIES = frozenset()
+
+
+class PluginRegistry:
+    # Everything we know about plugins by name, looked up case insensitively
+    def __init__(self):
+        self.plugins = {}
+
+    @classmethod
+    def load(cls, path=PLUGIN_DATA_PATH):
+        with open(path, "r") as f:
+            data = json.load(f)
+        registry = cls()
+        for category, names in data.get("categories", {}).items():
+            if category not in CATEGORIES:
+                raise ValueError(f"Unknown plugin category {category} in {path}")
+            for name in names:
+                registry.add(name, category)
+        for alias, name in data.get("aliases", {}).items():
+            registry.add_alias(alias, name)
+        return registry
+
+    def add(self, name, category):
+        key = name.casefold()
+        self.plugins[key] = self.plugins.get(key, NO_CATEGORIES) | {category}
+
+    def add_alias(self, alias, name):
+        self.plugins[alias.casefold()] = self.plugins.get(alias.casefold(), NO_CATEGORIES) | self.lookup(name)
+
+    def intern(self):
+        # Plugins with the same categories share one set, there's only a handful of combinations
+        shared = {}
+        for key, categories in self.plugins.items():
+            self.plugins[key] = shared.setdefault(categories, categories)
+
+    def lookup(self, name):
+        return self.plugins.get(name.casefold(), NO_CATEGORIES)
+
+    def __len__(self):
+        return len(self.plugins)
+
+
+plugin_registry = PluginRegistry.load()
+plugin_registry.intern()
+
+
+class Plugin:
+    __slots__ = ("name", "version", "categories")
+
+    def __init__(self, name, version):
+        self.name = name
+        self.version = version
+        self.categories = plugin_registry.lookup(name)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    def __repr__(self):
+        return f"{self.name} v{self.version}"
+
+    def get_version(self):
+        return self.version
+
+    def get_name(self):
+        return self.name
+
+    def is_a(self, category):
+        return category in self.categories
+
+    def get_color(self):
+        # Colour names, the report renderers turn these into ANSI codes or CSS
+        if BAD in self.categories:
+            return "red"
+        elif MEH in self.categories:
+            return "yellow"
+        else:
+            return "green"
@@ -0,0 +1,36 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Parsing is CPU bound, so that goes to other processes
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.environ.get("BATCH_PARSE_WORKERS", os.cpu_count() or 1)))
+# The pools get made from request threads, forking then would hand the workers any lock another thread was holding
+# (the rule loader's, urllib3's) with nobody left to let go of it. A forkserver starts them from a clean process instead
+PARSE_START_METHOD = os.environ.get("PARSE_START_METHOD", "forkserver")
+
+parse_pool = None
+parse_pool_lock = threading.Lock()
+# Set in the pool's own processes, they can't hand work on to a pool of their own
+worker = False
+
+
+def mark_worker():
+    global worker
+    worker = True
+
+
+def in_worker():
+    return worker
+
+
+def get_mp_context():
+    return multiprocessing.get_context(PARSE_START_METHOD)
+
+
+def get_parse_pool():
+    global parse_pool
+    with parse_pool_lock:
+        if parse_pool is None:
+            parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=get_mp_context(), initializer=mark_worker)
+        return parse_pool
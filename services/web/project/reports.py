@@ -0,0 +1,122 @@
+import html
+from colorama import Fore
+
+# The ways a result can be sent back, ansi is what the frontend used to get
+REPORT_FORMATS = ("ansi", "html", "json")
+RULE = "=============================="
+
+ANSI_COLORS = {
+    "green": Fore.GREEN,
+    "red": Fore.RED,
+    "yellow": Fore.YELLOW,
+    "cyan": Fore.CYAN,
+    "white": Fore.WHITE,
+}
+# The same colours the page used to turn the ANSI codes into
+HTML_COLORS = {
+    "green": "#55FF55",
+    "red": "#FF5555",
+    "yellow": "#FFFF55",
+    "cyan": "#55FFFF",
+    "white": "white",
+}
+
+
+def describe_repeats(exception):
+    count = exception.get("count", 1)
+    if count == 1:
+        return ""
+    return f" (x{count}, last on line {exception['last_line_number']})"
+
+
+def report_lines(result):
+    # The report as lines of (colour, text) pieces, it's up to the renderers what a colour looks like
+    lines = []
+    lines.append([("green" if result.supported else "red", f"Minecraft Version: {result.mc_version}")])
+    lines.append([("green" if result.running_paper else "red", f"Server Flavor: {result.flavor}")])
+    color = "green" if result.paper_version == result.latest_paper_version else "red"
+    lines.append([(color, f"Paper Version: {result.paper_version}")])
+    lines.append([("red" if result.is_offline else "green", f"Offline Mode: {result.is_offline}")])
+    if result.using_proxy:
+        lines.append([("cyan", f"Using {result.proxy_flavor} proxy")])
+    lines.append([("red" if result.has_malware else "green", f"Malware Detected: {result.has_malware}")])
+    if result.truncated:
+        lines.append([("yellow", f"Log was too long, only the first {result.line_count} lines were checked")])
+    if result.attempting_to_downgrade:
+        lines.append([("red", f"Server is attempting to downgrade. This is not supported! You're going from {result.downgraded_versions[0]} to {result.downgraded_versions[1]}")])
+    if result.invalid_players:
+        lines.append([("red", RULE)])
+        lines.append([("red", "The following players have invalid UUIDs: ")])
+        for player in result.invalid_players:
+            lines.append([("red", f"{player['username']} - {player['uuid']}")])
+        lines.append([("red", "These UUIDs either do not exist, or are for different usernames.")])
+    if result.unverified_players:
+        lines.append([("yellow", f"Couldn't verify {len(result.unverified_players)} players in time: ")])
+        for player in result.unverified_players:
+            lines.append([("yellow", f"{player['username']} - {player['uuid']}")])
+    lines.append([("green", "============PLUGINS============")])
+    for plugin in result.plugins:
+        lines.append([(plugin.get_color(), str(plugin))])
+    if result.has_ambiguous_plugins:
+        lines.append([("yellow", "==========AMBIGUOUS PLUGINS==========")])
+        for plugin in result.ambiguous_plugins:
+            lines.append([("yellow", f"Plugin Name: {plugin['plugin_name']}")])
+            lines.append([("yellow", f"Plugin Filenames: {plugin['plugin_filenames']}")])
+    lines.append([("green", RULE)])
+    if result.has_missing_dependencies:
+        lines.append([("cyan", "Server has missing dependencies. The following dependencies are missing: ")])
+        for dependency in result.missing_dependencies:
+            lines.append([("cyan", str(dependency))])
+        lines.append([("green", RULE)])
+    if result.possibly_cracked:
+        lines.append([("cyan", "Server is possibly cracked. The following plugins suggest this: ")])
+        for plugin in result.weird_plugins_acquired:
+            lines.append([(plugin.get_color(), str(plugin))])
+        lines.append([("green", RULE)])
+    if result.has_pirated_plugins:
+        lines.append([("cyan", "Server has pirated plugins. The following lines suggest this: ")])
+        for line in result.potentially_pirated_lines:
+            lines.append([("cyan", line)])
+        lines.append([("green", RULE)])
+    if result.has_exceptions:
+        lines.append([("cyan", "Server has exceptions. The following exceptions were found: ")])
+        for exception in result.exceptions:
+            lines.append([("cyan", f"Line {exception['line_number']}: "), ("yellow", exception["line"]),
+                          ("cyan", describe_repeats(exception))])
+            for frame in exception.get("frames", []):
+                lines.append([("cyan", f"    at {frame}")])
+        lines.append([("green", RULE)])
+    if result.invalid_config:
+        lines.append([("red", "Server has an invalid config. Use the following info to fix it! ")])
+        for line in result.mock_config.split("\n"):
+            if "<-- ERROR" in line:
+                # Point out the bad value
+                before, after = line.split("<-- ERROR", 1)
+                lines.append([("white", before + "<-- "), ("red", "ERROR" + after)])
+            else:
+                lines.append([("white", line)])
+        lines.append([("yellow", "You should find lines like look like this in your Paper configs.")])
+        lines.append([("green", RULE)])
+    return lines
+
+
+def render_ansi(result):
+    # One string per line, for terminals and anything else that understands the colour codes
+    return ["".join(ANSI_COLORS[color] + text for color, text in line) + Fore.RESET for line in report_lines(result)]
+
+
+def render_html(result):
+    # Everything from the log is escaped, this goes straight into the page
+    rendered = []
+    for line in report_lines(result):
+        rendered.append("".join(f'<span style="color: {HTML_COLORS[color]}">{html.escape(text)}</span>' for color, text in line if text))
+    return "\n".join(rendered)
+
+
+def render(result, report_format):
+    # The response body for each format
+    if report_format == "json":
+        return {"result": result.to_dict()}
+    if report_format == "html":
+        return {"html": render_html(result)}
+    return {"output": render_ansi(result)}
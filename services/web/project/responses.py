@@ -0,0 +1,34 @@
+import time
+from . import codec
+from .reports import REPORT_FORMATS
+from .metrics import Timings, request_seconds
+
+# What both the Flask and the Quart apps need from a request, they pass in their own g, request and Response
+UNKNOWN_FORMAT_ERROR = f"Unknown format, use one of {', '.join(REPORT_FORMATS)}"
+
+
+def start_timing(g):
+    g.started_at = time.perf_counter()
+    g.timings = Timings()
+
+
+def finish_timing(g, request, response):
+    timings = g.get("timings")
+    if timings is None:
+        return response
+    # Browser dev tools and curl -v both show this, so you can see where a slow parse spent its time
+    timings.add("total", time.perf_counter() - g.started_at)
+    response.headers["Server-Timing"] = timings.server_timing()
+    request_seconds.observe(timings.durations["total"], route=request.url_rule.rule if request.url_rule else "unmatched", status=response.status_code)
+    return response
+
+
+def get_report_format(requested):
+    report_format = requested or "ansi"
+    return report_format if report_format in REPORT_FORMATS else None
+
+
+def result_response(payload, request, response_class):
+    # orjson/msgpack when we have them, these can be big
+    body, mimetype = codec.encode(payload, request.headers.get("Accept"))
+    return response_class(body, mimetype=mimetype)
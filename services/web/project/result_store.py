@@ -0,0 +1,62 @@
+import os
+from hashlib import sha256
+from .store import SqliteCache
+
+# url -> sha256 of the log's content, pastes rarely change so this can live a while
+URL_TTL = int(os.environ.get("RESULT_URL_TTL", 60 * 60))
+# sha256 of the log's content -> the analysis of it
+RESULT_TTL = int(os.environ.get("RESULT_TTL", 24 * 60 * 60))
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_BYTES", 256 * 1024 * 1024))
+
+urls = SqliteCache("result_urls", max_entries=int(os.environ.get("RESULT_URL_MAX_ENTRIES", 100000)))
+results = SqliteCache("results", max_bytes=RESULT_STORE_MAX_BYTES)
+
+
+class ContentHasher:
+    # Hashes the log a line at a time, line endings don't matter so the same log from two paste sites matches
+    def __init__(self):
+        self.hasher = sha256()
+
+    def update(self, line):
+        self.hasher.update(line.encode("utf-8", "surrogatepass"))
+        self.hasher.update(b"\n")
+
+    def update_raw(self, data):
+        # Lines that are already encoded, each with its \n
+        self.hasher.update(data)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def get_by_url(url):
+    if not url:
+        return None
+    content_hash = urls.get(url)
+    if content_hash is None:
+        return None
+    return get_reusable_by_hash(content_hash)
+
+
+def get_by_hash(content_hash):
+    return results.get(content_hash)
+
+
+def get_reusable_by_hash(content_hash):
+    # Uploads are stored even with players we couldn't verify so their share links work, but another parse
+    # of the same log should try those lookups again rather than pick up the gaps
+    stored = results.get(content_hash)
+    if stored is None or stored.get("unverified_players"):
+        return None
+    return stored
+
+
+def put(url, content_hash, data):
+    results.set(content_hash, data, ttl=RESULT_TTL)
+    if url:
+        urls.set(url, content_hash, ttl=URL_TTL)
+
+
+def remember_url(url, content_hash):
+    if url:
+        urls.set(url, content_hash, ttl=URL_TTL)
@@ -0,0 +1,64 @@
+from .plugins import Plugin
+from . import codec
+
+# Everything that makes up the outcome of run_checks, this is what gets stored and shared between workers
+result_fields = [
+    "mc_version", "paper_version", "latest_paper_version", "flavor", "flavor_line", "supported", "running_paper",
+    "line_count", "truncated", "content_hash", "is_offline", "using_proxy", "proxy_flavor", "possibly_cracked",
+    "has_pirated_plugins", "potentially_pirated_lines", "has_missing_dependencies", "missing_dependencies",
+    "has_exceptions", "exceptions", "exception_count", "has_ambiguous_plugins", "ambiguous_plugins", "attempting_to_downgrade",
+    "downgraded_versions", "has_malware", "malware_count", "rule_matches", "invalid_config", "invalid_config_locations",
+    "mock_config", "players", "invalid_players", "unverified_players"
+]
+# Lists of Plugin, they go out as [name, version] pairs
+plugin_fields = ["plugins", "weird_plugins_acquired"]
+
+
+class AnalysisResult:
+    # What run_checks found and nothing else, so it's cheap to keep around, compare and send
+    # Everything in it besides the plugins is already plain JSON
+    __slots__ = tuple(result_fields + plugin_fields)
+
+    def __init__(self, **values):
+        for field in result_fields:
+            setattr(self, field, values.get(field))
+        for field in plugin_fields:
+            setattr(self, field, values.get(field) or [])
+
+    @classmethod
+    def from_log_file(cls, log_file):
+        return cls(**{field: getattr(log_file, field) for field in cls.__slots__})
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {field: data.get(field) for field in result_fields}
+        for field in plugin_fields:
+            values[field] = [Plugin(name, version) for name, version in data.get(field, [])]
+        return cls(**values)
+
+    @classmethod
+    def from_json(cls, raw):
+        return cls.from_dict(codec.loads(raw))
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in result_fields}
+        for field in plugin_fields:
+            data[field] = [[plugin.name, plugin.version] for plugin in getattr(self, field)]
+        return data
+
+    def to_json(self):
+        return codec.dumps(self.to_dict())
+
+    def to_msgpack(self):
+        return codec.packb(self.to_dict())
+
+    def __eq__(self, other):
+        if not isinstance(other, AnalysisResult):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def changes_from(self, other):
+        # The fields that differ from an earlier result, for comparing two runs over the same log
+        ours = self.to_dict()
+        theirs = other.to_dict()
+        return [field for field in ours if ours[field] != theirs[field]]
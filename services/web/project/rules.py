@@ -0,0 +1,167 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from hashlib import sha1
+from .plugins import MALWARE
+from .matcher import LiteralMatcher
+
+logger = logging.getLogger(__name__)
+
+RULES_DATA_PATH = os.environ.get("RULES_DATA_PATH", os.path.join(os.path.dirname(__file__), "data", "rules.json"))
+# Seconds between checking whether the rules file changed, every worker picks up the new rules on its own
+RULES_RELOAD_INTERVAL = float(os.environ.get("RULES_RELOAD_INTERVAL", 5))
+
+# Lines that say a plugin came from a leak site
+PIRATED = "pirated"
+# Exceptions that aren't worth reporting
+IGNORED_EXCEPTION = "ignored_exception"
+CATEGORIES = (MALWARE, PIRATED, IGNORED_EXCEPTION)
+# The ones that get reported when they match, the ignored exceptions only filter the exceptions check
+DETECTION_CATEGORIES = (MALWARE, PIRATED)
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+
+
+class Rule:
+    __slots__ = ("name", "category", "severity", "pattern", "regex", "literals", "literals_ignore_case", "max_lines", "description")
+
+    def __init__(self, name, category, pattern, severity="medium", literals=None, literals_ignore_case=None,
+                 max_lines=None, description=""):
+        self.name = name
+        self.category = category
+        self.severity = severity
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        # What a line has to contain for the pattern to have a chance, same as a line check's literals
+        self.literals = literals or []
+        self.literals_ignore_case = [literal.lower() for literal in literals_ignore_case or []]
+        # How far into the log the rule is looked for, if not given it's up to the check using it
+        self.max_lines = max_lines
+        self.description = description
+
+    @classmethod
+    def from_dict(cls, data, path):
+        name = data.get("name")
+        # Matches are recorded under the name, and it's how two rules are told apart
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"Every rule in {path} needs a name")
+        if data.get("category") not in CATEGORIES:
+            raise ValueError(f"Unknown rule category {data.get('category')} for {name} in {path}")
+        if data.get("severity", "medium") not in SEVERITIES:
+            raise ValueError(f"Unknown rule severity {data.get('severity')} for {name} in {path}")
+        try:
+            re.compile(data["pattern"])
+        except (KeyError, re.error) as e:
+            raise ValueError(f"Rule {name} in {path} doesn't have a usable pattern: {e}")
+        return cls(name, data["category"], data["pattern"], severity=data.get("severity", "medium"),
+                   literals=data.get("literals"), literals_ignore_case=data.get("literals_ignore_case"),
+                   max_lines=data.get("max_lines"), description=data.get("description", ""))
+
+    def has_literals(self):
+        return len(self.literals) > 0 or len(self.literals_ignore_case) > 0
+
+
+class RuleSet:
+    # The rules' literals all go into one LiteralMatcher, the same as the line checks', so a line is only run
+    # through the patterns of rules whose literals it has. Most lines have none, and those cost the same however many rules there are
+    def __init__(self, rules, version=None):
+        self.rules = rules
+        self.by_name = {}
+        for rule in rules:
+            if rule.name in self.by_name:
+                raise ValueError(f"Rule {rule.name} is defined twice")
+            self.by_name[rule.name] = rule
+        # Which file the rules came from, so it's clear from the logs what a worker was running with
+        self.version = version
+        self.matcher = LiteralMatcher()
+        # Rules without literals get tried on every line
+        self.unfiltered = set()
+        for key, rule in enumerate(rules):
+            if rule.has_literals():
+                self.matcher.add(key, rule.literals)
+                self.matcher.add(key, rule.literals_ignore_case, ignore_case=True)
+            else:
+                self.unfiltered.add(key)
+        # Up front, a RuleSet is shared by every thread in the worker
+        self.matcher.compile()
+
+    @classmethod
+    def load(cls, path=RULES_DATA_PATH):
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        rules = [Rule.from_dict(entry, path) for entry in data.get("rules", [])]
+        return cls(rules, version=sha1(raw).hexdigest()[:16])
+
+    def matches(self, line, categories=None):
+        # Every rule that matches the line and what it matched, in the order they're in the file
+        keys = self.matcher.match(line)
+        keys = self.unfiltered if keys is None else keys | self.unfiltered
+        found = []
+        for key in sorted(keys):
+            rule = self.rules[key]
+            if categories is not None and rule.category not in categories:
+                continue
+            match = rule.regex.search(line)
+            if match:
+                found.append((rule, match[0]))
+        return found
+
+    def first_match(self, line, category):
+        found = self.matches(line, (category,))
+        return found[0][0] if found else None
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+
+class RuleLoader:
+    # Keeps the rules up to date with their file, a broken edit keeps the last good rules rather than taking parsing down
+    def __init__(self, path=RULES_DATA_PATH, interval=RULES_RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.rules = None
+        self.file_id = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self.rules is not None and now - self.checked_at < self.interval:
+            return self.rules
+        with self.lock:
+            if self.rules is None or now - self.checked_at >= self.interval:
+                self.checked_at = now
+                self.reload()
+        return self.rules
+
+    def reload(self):
+        try:
+            stat = os.stat(self.path)
+            # Editors usually write a new file and move it into place, so the inode changes too
+            file_id = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if file_id == self.file_id:
+                return
+            rules = RuleSet.load(self.path)
+        except (OSError, ValueError) as e:
+            if self.rules is None:
+                raise
+            logger.error("Couldn't reload rules from %s, keeping version %s: %s", self.path, self.rules.version, e)
+            return
+        self.file_id = file_id
+        self.rules = rules
+        logger.info("Loaded %d rules from %s, version %s", len(rules), self.path, rules.version)
+
+
+rule_loader = RuleLoader()
+# Load them now so a bad rules file stops us starting up, later on it only gets logged
+rule_loader.get()
+
+
+def get_rules():
+    return rule_loader.get()
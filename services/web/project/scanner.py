@@ -0,0 +1,136 @@
+import time
+from .matcher import LiteralMatcher
+
+
+class LineHandler:
+    def __init__(self, name, callback, max_lines=None, stop_on=None, on_finish=None, literals=None, literals_ignore_case=None):
+        self.name = name
+        # callback(index, line) -> truthy when the handler doesn't need any more lines
+        self.callback = callback
+        # Only lines with an index below this are handed to the callback
+        self.max_lines = max_lines
+        # The handler stops as soon as a line containing this is seen, the line itself isn't handled
+        self.stop_on = stop_on
+        self.on_finish = on_finish
+        # If given, the callback is only called for lines containing at least one of these
+        self.literals = literals
+        self.literals_ignore_case = literals_ignore_case
+        self.done = False
+        # Whether we stopped because of stop_on, rather than running out of lines
+        self.stopped = False
+        # Time spent in the callback, the literal matching everyone shares isn't counted
+        self.seconds = 0.0
+
+    def wants_every_line(self):
+        return self.literals is None and self.literals_ignore_case is None
+
+    def handle(self, index, line):
+        if self.max_lines is not None and index >= self.max_lines:
+            self.done = True
+            return
+        if self.stop_on is not None and self.stop_on in line:
+            self.done = True
+            self.stopped = True
+            return
+        start = time.perf_counter()
+        if self.callback(index, line):
+            self.done = True
+        self.seconds += time.perf_counter() - start
+
+    def finish(self):
+        self.done = True
+        if self.on_finish:
+            start = time.perf_counter()
+            self.on_finish()
+            self.seconds += time.perf_counter() - start
+
+
+class Scanner:
+    # Runs every registered handler from one loop over the log, instead of each check walking the lines itself
+    def __init__(self, first_index=0):
+        # Where in the log the first line we're fed sits, for scanning a piece from the middle of one
+        self.first_index = first_index
+        self.handlers = []
+        self.active = []
+        self.every_line = []
+        self.matcher = LiteralMatcher()
+        self.next_limit = None
+        self.line_count = 0
+        self.finished = False
+
+    def register(self, name, callback, max_lines=None, stop_on=None, on_finish=None, literals=None, literals_ignore_case=None):
+        handler = LineHandler(name, callback, max_lines=max_lines, stop_on=stop_on, on_finish=on_finish,
+                              literals=literals, literals_ignore_case=literals_ignore_case)
+        self.handlers.append(handler)
+        self.active.append(handler)
+        if handler.wants_every_line():
+            self.every_line.append(handler)
+        else:
+            key = len(self.handlers) - 1
+            self.matcher.add(key, handler.literals or [])
+            self.matcher.add(key, handler.literals_ignore_case or [], ignore_case=True)
+            if stop_on is not None:
+                # We need to see the stop line to know when to stop
+                self.matcher.add(key, [stop_on])
+        self.update_next_limit()
+        return handler
+
+    def is_done(self):
+        return len(self.active) == 0
+
+    def update_next_limit(self):
+        limits = [handler.max_lines for handler in self.active if handler.max_lines is not None]
+        self.next_limit = min(limits) if limits else None
+
+    def expire(self, index):
+        # Handlers only see the lines they have literals for, so they don't notice running out of lines themselves
+        for handler in self.active:
+            if handler.max_lines is not None and index >= handler.max_lines:
+                handler.done = True
+        self.drop_done()
+
+    def drop_done(self):
+        self.active = [handler for handler in self.active if not handler.done]
+        self.every_line = [handler for handler in self.every_line if not handler.done]
+        self.update_next_limit()
+
+    def feed(self, line):
+        # Returns False once every handler is done, so callers can stop reading early
+        index = self.first_index + self.line_count
+        self.line_count += 1
+        if self.next_limit is not None and index >= self.next_limit:
+            self.expire(index)
+        dropped = False
+        for handler in self.every_line:
+            handler.handle(index, line)
+            if handler.done:
+                dropped = True
+        keys = self.matcher.match(line)
+        if keys:
+            for key in sorted(keys):
+                handler = self.handlers[key]
+                if handler.done:
+                    continue
+                handler.handle(index, line)
+                if handler.done:
+                    dropped = True
+        if dropped:
+            # Something finished, drop it so we don't keep calling it
+            self.drop_done()
+        return len(self.active) > 0
+
+    def scan(self, lines):
+        for line in lines:
+            if not self.feed(line):
+                break
+        self.finish()
+        return self.line_count
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        for handler in self.handlers:
+            handler.finish()
+        self.active = []
+        self.every_line = []
@@ -0,0 +1,131 @@
+import os
+from .scanner import Scanner
+from .traces import is_trace_continuation, merge_groups
+from .plugins import Plugin
+
+# Logs with at least this many lines get split up and scanned on the parse pool
+SHARD_MIN_LINES = int(os.environ.get("SHARD_MIN_LINES", 200000))
+SHARD_LINES = int(os.environ.get("SHARD_LINES", 100000))
+# An offline warning's window is 10 lines including itself, so a shard needs to see 9 lines past its end
+OFFLINE_LOOKAHEAD = 9
+OFFLINE_WARNING = "SERVER IS RUNNING IN OFFLINE/INSECURE MODE!"
+
+
+def find_shard_bounds(lines, shard_lines=None):
+    shard_lines = shard_lines or SHARD_LINES
+    bounds = []
+    start = 0
+    while start < len(lines):
+        end = min(start + shard_lines, len(lines))
+        # Never cut a stack trace in half, the next shard starts after it
+        while end < len(lines) and is_trace_continuation(lines[end]):
+            end += 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+class OfflineShard:
+    # The offline check for one shard, it can't know about windows opened before it so it just reports what it saw
+    # and merge_shards works out what a single pass would have found
+    def __init__(self, end):
+        self.end = end
+        self.first_window = None
+        self.last_window = None
+        self.stop = None
+        self.proxy_flavor = ""
+
+    def scan_line(self, i, line):
+        # Windows only open on our own lines, the lookahead is just to see how ours end
+        if OFFLINE_WARNING in line and i < self.end:
+            if self.first_window is None:
+                self.first_window = i
+            self.last_window = i
+        if self.last_window is None or i >= self.last_window + 10:
+            return
+        if "BungeeCord" in line:
+            self.proxy_flavor = "BungeeCord"
+        elif "Velocity" in line:
+            self.proxy_flavor = "Velocity"
+        else:
+            return
+        # The first proxy line with one of our windows open, a single pass would have stopped here
+        self.stop = i
+        return True
+
+
+def scan_shard(log_file, lines, start, lookahead):
+    # Runs every line check over lines[start:] as if they were at that spot in the whole log
+    offline = OfflineShard(start + len(lines))
+    scanner = Scanner(first_index=start)
+    for check in log_file.line_checks():
+        if check["name"] == "offline_mode":
+            check = dict(check, callback=offline.scan_line, on_finish=None)
+        scanner.register(**check)
+    for line in lines:
+        if not scanner.feed(line):
+            break
+    if offline.stop is None and offline.last_window is not None:
+        for i, line in enumerate(lookahead, start=start + len(lines)):
+            if offline.scan_line(i, line):
+                break
+    scanner.finish()
+    data = log_file.to_dict()
+    data["line_count"] = len(lines)
+    data["plugins_stopped"] = any(handler.stopped for handler in scanner.handlers if handler.name == "plugins")
+    data["offline_first_window"] = offline.first_window
+    data["offline_stop"] = offline.stop
+    data["offline_proxy_flavor"] = offline.proxy_flavor
+    return data
+
+
+def merge_shards(log_file, results):
+    # Puts the shard results back together the way one pass over the whole log would have
+    plugins_done = False
+    config_found = False
+    players = {}
+    offline_stop = None
+    first_window = None
+    for data in results:
+        if log_file.flavor_line is None and data["flavor_line"] is not None:
+            for field in ("flavor_line", "mc_version", "flavor", "supported"):
+                setattr(log_file, field, data[field])
+        if not plugins_done:
+            log_file.plugins.extend(Plugin(name, version) for name, version in data["plugins"])
+            plugins_done = data["plugins_stopped"]
+        log_file.ambiguous_plugins.extend(data["ambiguous_plugins"])
+        log_file.has_ambiguous_plugins = log_file.has_ambiguous_plugins or data["has_ambiguous_plugins"]
+        log_file.potentially_pirated_lines.extend(data["potentially_pirated_lines"])
+        log_file.has_pirated_plugins = log_file.has_pirated_plugins or data["has_pirated_plugins"]
+        log_file.missing_dependencies.extend(data["missing_dependencies"])
+        log_file.has_missing_dependencies = log_file.has_missing_dependencies or data["has_missing_dependencies"]
+        log_file.exception_count += data["exception_count"]
+        log_file.has_exceptions = log_file.has_exceptions or data["has_exceptions"]
+        # Each downgrade line overwrites the last one
+        if data["attempting_to_downgrade"]:
+            log_file.attempting_to_downgrade = True
+            log_file.downgraded_versions = data["downgraded_versions"]
+        log_file.malware_count += data["malware_count"]
+        log_file.has_malware = log_file.has_malware or data["has_malware"]
+        log_file.rule_matches.extend(data["rule_matches"])
+        # Only the first bad config counts
+        if not config_found and data["invalid_config"]:
+            config_found = True
+            for field in ("invalid_config", "invalid_config_locations", "mock_config"):
+                setattr(log_file, field, data[field])
+        for player in data["players"]:
+            players.setdefault((player["username"], player["uuid"]), player)
+        if data["offline_first_window"] is not None and first_window is None:
+            first_window = data["offline_first_window"]
+        if data["offline_stop"] is not None and (offline_stop is None or data["offline_stop"] < offline_stop):
+            offline_stop = data["offline_stop"]
+            log_file.proxy_flavor = data["offline_proxy_flavor"]
+    log_file.line_count = sum(data["line_count"] for data in results)
+    log_file.exceptions = merge_groups(data["exceptions"] for data in results)
+    log_file.players = list(players.values())
+    # A window that ran its 10 lines before the first proxy line means we're offline, past that the check had stopped
+    if offline_stop is not None:
+        log_file.using_proxy = True
+        log_file.is_offline = first_window is not None and first_window + 10 <= offline_stop
+    else:
+        log_file.is_offline = first_window is not None
@@ -0,0 +1,17 @@
+import os
+from . import paper_builds
+from .constants import data_version_to_mc
+from .thumbnails import prerender_badges, FONT_PATH
+
+PAPER_BUILD_WARM = os.environ.get("PAPER_BUILD_WARM", "true").lower() == "true"
+
+
+def warm_up():
+    # Run by the servers once a process is up to take requests (gunicorn.conf.py, Quart's before_serving), never on import
+    # so the CLI commands, benchmarks and tests don't go fetching Paper builds
+    if PAPER_BUILD_WARM:
+        # Fill the build cache for every release we know about so the first parses don't wait on the Paper API
+        paper_builds.warm(list(dict.fromkeys(data_version_to_mc.values())))
+    if os.path.exists(FONT_PATH):
+        # Get the thumbnail badges drawn before the first request needs them
+        prerender_badges()
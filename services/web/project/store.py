@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from .metrics import record_cache
+from . import codec
+
+# One SQLite file shared by every gunicorn worker, each cache gets its own table
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "project/cache/cache.sqlite3")
+# Reads only bump an entry's last access time if it's older than this, so hits don't always mean a write
+ACCESS_RESOLUTION = 60
+# How many writes we let through between eviction sweeps
+EVICT_EVERY = 50
+# Keys per query for get_many, older SQLite builds only take 999 parameters
+MAX_QUERY_KEYS = 500
+
+MISSING = object()
+
+
+async def run_in_thread(func, *args):
+    # For the async app, another worker writing can keep a call waiting on the busy timeout and that can't hold up the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class SqliteCache:
+    def __init__(self, table, path=CACHE_DB_PATH, max_entries=None, max_bytes=None):
+        self.table = table
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.writes = 0
+
+    def connect(self):
+        # SQLite connections can't be shared between threads, or survive a fork
+        conn = getattr(self.local, "conn", None)
+        if conn is not None and self.local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_access REAL, size INTEGER)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_access ON {self.table} (last_access)")
+        self.local.conn = conn
+        self.local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        conn = self.connect()
+        now = time.time()
+        row = conn.execute(f"SELECT value, expires_at, last_access FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            record_cache(self.table, False)
+            return default
+        value, expires_at, last_access = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+            record_cache(self.table, False)
+            return default
+        record_cache(self.table, True)
+        if now - last_access > ACCESS_RESOLUTION:
+            conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        return codec.loads(value)
+
+    def get_many(self, keys):
+        # The same as get for a batch of keys in a query rather than one each, only the keys we have come back
+        conn = self.connect()
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        expired = []
+        touched = []
+        for start in range(0, len(keys), MAX_QUERY_KEYS):
+            batch = keys[start:start + MAX_QUERY_KEYS]
+            placeholders = ", ".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, value, expires_at, last_access FROM {self.table} WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, value, expires_at, last_access in rows:
+                if expires_at is not None and expires_at <= now:
+                    expired.append((key, now))
+                    continue
+                found[key] = codec.loads(value)
+                if now - last_access > ACCESS_RESOLUTION:
+                    touched.append((now, key))
+        for key in keys:
+            record_cache(self.table, key in found)
+        if expired:
+            conn.executemany(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", expired)
+        if touched:
+            conn.executemany(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", touched)
+        return found
+
+    def set(self, key, value, ttl=None):
+        conn = self.connect()
+        now = time.time()
+        encoded = codec.dumps(value).decode("utf-8")
+        expires_at = now + ttl if ttl is not None else None
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, expires_at, now, len(encoded))
+        )
+        self.writes += 1
+        if self.writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def add(self, key, value, ttl=None):
+        # Only sets the key if it isn't already there (or has expired), returns whether we got it
+        conn = self.connect()
+        now = time.time()
+        encoded = codec.dumps(value).decode("utf-8")
+        expires_at = now + ttl if ttl is not None else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (key, value, expires_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, expires_at, now, len(encoded))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self.connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def evict(self):
+        conn = self.connect()
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        if self.max_entries is not None:
+            # Drop the least recently used entries past our limit
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        if self.max_bytes is not None:
+            total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the least recently used end until we're back under budget
+                to_free = total - self.max_bytes
+                keys = []
+                for key, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access ASC"):
+                    keys.append(key)
+                    to_free -= size
+                    if to_free <= 0:
+                        break
+                conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in keys])
+
+    def __len__(self):
+        return self.connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -0,0 +1,213 @@
+import os
+import time
+import tempfile
+from functools import lru_cache
+from hashlib import sha256
+from PIL import Image, ImageDraw, ImageFont
+from .metrics import record_cache
+
+FONT_PATH = "project/static/fonts/Roboto-Regular.ttf"
+BACKGROUND_COLOR = (48, 49, 54)
+RED = (156, 26, 26)
+GREEN = (28, 156, 26)
+# Has to stay inside static, the thumbnails are served from there
+THUMBNAIL_DIR = "project/static/parses"
+THUMBNAIL_MAX_BYTES = int(os.environ.get("THUMBNAIL_MAX_BYTES", 512 * 1024 * 1024))
+THUMBNAIL_MAX_FILES = int(os.environ.get("THUMBNAIL_MAX_FILES", 20000))
+# Hits only bump a thumbnail's last access time if it's older than this
+TOUCH_RESOLUTION = 60
+# How many new thumbnails we write between eviction sweeps
+EVICT_EVERY = 25
+
+# Every status badge a thumbnail can have, they never change so they only get drawn once
+BADGES = {
+    "offline": ("Offline Mode", RED),
+    "online": ("Online Mode", GREEN),
+    "malware": ("Malware Detected", RED),
+    "no_malware": ("No Malware", GREEN),
+    "pirated": ("Pirated Plugins", RED),
+    "no_piracy": ("No Piracy", GREEN),
+}
+
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    # Loading the font from disk is the slow part, so each size is only loaded once per process
+    return ImageFont.truetype(FONT_PATH, size)
+
+
+def make_rectangle_to_fit_text(text, color, backgound_color=BACKGROUND_COLOR):
+    W, H = (350, 50)
+    im = Image.new("RGBA", (W, H), backgound_color)
+    draw = ImageDraw.Draw(im)
+    font = get_font(40)
+    # Draw a rounded rectangle in the middle of the image
+    draw.rounded_rectangle((0, 0, W, H), fill=color, radius=10)
+    w, h = draw.textsize(text, font=font)
+    # This'll center the text, for strings without Ys and Qs it'll be too low, we need to fix that
+    # This shit is jank but I suck at Pillow so it works
+    if "y" in text.lower() or "q" in text.lower():
+        draw.text(((W - w) / 2, (H - h) / 2), text, fill="white", font=font)
+    else:
+        draw.text(((W - w) / 2, ((H - h) / 2) - 5), text, fill="white", font=font)
+    return im
+
+
+@lru_cache(maxsize=None)
+def get_badge(name):
+    text, color = BADGES[name]
+    return make_rectangle_to_fit_text(text, color)
+
+
+def prerender_badges():
+    for name in BADGES:
+        get_badge(name)
+
+
+def render_thumbnail(log_data, url):
+    img = Image.new("RGBA", (1200, 320), BACKGROUND_COLOR)
+
+    drawer = ImageDraw.Draw(img)
+    # Create a sub title with the url
+    drawer.text((40, 0), url.replace("https://", ""), (200, 200, 200), font=get_font(30))
+
+    # First we'll do if the server is online or not
+    status_rect = get_badge("offline" if log_data.is_offline else "online")
+    img.paste(status_rect, (40, 80))
+    # Malware detected, put this next to the online/offline box
+    malware_rect = get_badge("malware" if log_data.has_malware else "no_malware")
+    img.paste(malware_rect, (40 + status_rect.width + 20, 80))
+    piracy_rect = get_badge("pirated" if log_data.has_pirated_plugins else "no_piracy")
+    img.paste(piracy_rect, (40 + status_rect.width + malware_rect.width + 40, 80))
+
+    # About half way down the image we wanna list the server's flavor
+    text_font = get_font(30)
+    flavor_line = log_data.flavor_line
+    flavor = flavor_line.split("This server is running")[1].split(" version ")[0].strip()
+    version = flavor_line.split("version ")[1].split(" (")[0].strip()
+    drawer.text((40, 180), f"{flavor} server {version}", (255, 255, 255), font=text_font)
+    # Add the plugin count
+    drawer.text((40, 230), f"Using {len(log_data.plugins)} plugins", (255, 255, 255), font=text_font)
+    if log_data.invalid_config:
+        drawer.text((40, 280), "Invalid config at: " + ".".join(log_data.invalid_config_locations), (255, 200, 200), font=text_font)
+    else:
+        # Add the exception count
+        drawer.text((40, 280), f"Encountered {log_data.exception_count or len(log_data.exceptions)} exceptions", (255, 255, 255), font=text_font)
+    return img
+
+
+class ThumbnailStore:
+    # Keeps rendered thumbnails on disk under a size and file count budget, dropping the least recently used first
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=THUMBNAIL_MAX_BYTES, max_files=THUMBNAIL_MAX_FILES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def static_path_for(self, key):
+        # What url_for('static', ...) wants
+        return f"parses/{key}.png"
+
+    def get(self, key):
+        path = self.path_for(key)
+        try:
+            modified = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self.misses += 1
+            record_cache("thumbnails", False)
+            return None
+        self.hits += 1
+        record_cache("thumbnails", True)
+        # The modified time doubles as our last access time, atime can't be trusted on most mounts
+        now = time.time()
+        if now - modified > TOUCH_RESOLUTION:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                pass
+        return self.static_path_for(key)
+
+    def put(self, key, img):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write somewhere else first and swap it in, so nobody ever serves a half written png
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, format="PNG")
+            os.replace(temp_path, self.path_for(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.writes += 1
+        if self.writes % EVICT_EVERY == 0:
+            self.evict()
+        return self.static_path_for(key)
+
+    def list_entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        if not os.path.isdir(self.directory):
+            return 0
+        entries = self.list_entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        total_files = len(entries)
+        removed = 0
+        # Oldest access first
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes and total_files <= self.max_files:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker beat us to it
+                pass
+            total_bytes -= size
+            total_files -= 1
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def stats(self):
+        entries = self.list_entries() if os.path.isdir(self.directory) else []
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_files": self.max_files,
+            "max_bytes": self.max_bytes
+        }
+
+
+thumbnail_store = ThumbnailStore()
+
+
+def generate_output_image(log_data, url):
+    # Hash the url
+    url_hash = sha256(url.encode()).hexdigest()
+    # Check if the image already exists
+    path = thumbnail_store.get(url_hash)
+    if path:
+        return path
+    img = render_thumbnail(log_data, url)
+    return thumbnail_store.put(url_hash, img)
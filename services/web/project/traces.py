@@ -0,0 +1,107 @@
+import os
+import re
+from hashlib import sha1
+
+# How many frames from the top of a trace go into its signature, deeper than this it's mostly the server's own code
+TRACE_SIGNATURE_FRAMES = int(os.environ.get("TRACE_SIGNATURE_FRAMES", 5))
+# What the lines after an exception look like, the scanner uses these to pick them out
+TRACE_LITERALS = ["\tat ", "    at ", "Caused by: ", "... "]
+
+exception_type_regex = re.compile(r"(?:[A-Za-z_$][\w$]*\.)*[A-Za-z_$][\w$]*(?:Exception|Error)\b")
+# The frame itself, anchored on the indent so an "at " in the thread name ("Async Chat Thread") isn't mistaken for it
+frame_regex = re.compile(r"(?:\t|    )at (.+)")
+
+
+def is_trace_continuation(line):
+    if "\tat " in line or "    at " in line or "Caused by: " in line:
+        return True
+    # "\t... 23 more"
+    return "... " in line and line.endswith(" more")
+
+
+def get_exception_type(line):
+    matches = exception_type_regex.findall(line)
+    # Rather the fully qualified name than a word from the message
+    for match in matches:
+        if "." in match:
+            return match
+    return matches[0] if matches else "Unknown"
+
+
+def get_frame(line):
+    # Just the "at ..." bit, whatever came before it on the line changes with the time and the thread
+    match = frame_regex.search(line)
+    return match[1].strip() if match else None
+
+
+class TraceGrouper:
+    # Folds each exception line and the frames right after it into one trace, and traces with the same signature into one group
+    def __init__(self, signature_frames=TRACE_SIGNATURE_FRAMES):
+        self.signature_frames = signature_frames
+        self.groups = {}
+        self.total = 0
+        # The trace we're building, it's only closed once we see something that can't be part of it
+        self.header = None
+        self.header_index = None
+        self.last_index = None
+        self.frames = []
+
+    def add_header(self, index, line):
+        self.close()
+        self.header = line
+        self.header_index = index
+        self.last_index = index
+        self.frames = []
+
+    def add_continuation(self, index, line):
+        # Returns False if there's no trace for this line to belong to
+        if self.header is None or index != self.last_index + 1:
+            return False
+        self.last_index = index
+        if len(self.frames) < self.signature_frames and "Caused by: " not in line:
+            frame = get_frame(line)
+            if frame is not None:
+                self.frames.append(frame)
+        return True
+
+    def close(self):
+        if self.header is None:
+            return
+        exception_type = get_exception_type(self.header)
+        signature = sha1("\n".join([exception_type] + self.frames).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+        group = self.groups.get(signature)
+        if group is None:
+            self.groups[signature] = {
+                "signature": signature,
+                "exception": exception_type,
+                "line": self.header,
+                "line_number": self.header_index,
+                "last_line_number": self.header_index,
+                "frames": self.frames,
+                "count": 1
+            }
+        else:
+            group["count"] += 1
+            group["last_line_number"] = self.header_index
+        self.total += 1
+        self.header = None
+        self.frames = []
+
+    def finish(self):
+        self.close()
+        # In the order we first saw them
+        return list(self.groups.values())
+
+
+def merge_groups(group_lists):
+    # Puts the groups from consecutive pieces of one log back together, in log order
+    merged = {}
+    for groups in group_lists:
+        for group in groups:
+            existing = merged.get(group["signature"])
+            if existing is None:
+                merged[group["signature"]] = dict(group)
+            else:
+                existing["count"] += group["count"]
+                existing["last_line_number"] = group["last_line_number"]
+    return list(merged.values())
@@ -0,0 +1,73 @@
+import io
+import os
+from tempfile import NamedTemporaryFile
+from .ingest import LogTooLargeError, CHUNK_SIZE
+
+# Uploads stay in memory up to this size, past it they go to a temporary file
+UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", 8 * 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+
+
+class UploadSpool:
+    # Holds an uploaded log while we parse it, the body is written in as it arrives so we never hold it all as one bytes
+    def __init__(self, content_length=None, max_bytes=MAX_UPLOAD_BYTES):
+        if content_length is not None and content_length > max_bytes:
+            raise LogTooLargeError(f"Log is {content_length} bytes, the limit is {max_bytes}")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.file = io.BytesIO()
+        # Set once it's on disk
+        self.path = None
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        # Chunked uploads don't tell us how big they are up front
+        if self.size > self.max_bytes:
+            raise LogTooLargeError(f"Log is over the {self.max_bytes} byte limit")
+        if self.path is None and self.size > UPLOAD_SPOOL_BYTES:
+            self.rollover()
+        self.file.write(chunk)
+
+    def rollover(self):
+        # Moves the upload to a file with a name, so a parse worker can open it rather than us pickling the body over
+        if self.path is not None:
+            return self.path
+        disk = NamedTemporaryFile(prefix="upload-")
+        with self.file.getbuffer() as body:
+            disk.write(body)
+        disk.flush()
+        disk.seek(self.file.tell())
+        self.file.close()
+        self.file = disk
+        self.path = disk.name
+        return self.path
+
+    def finish(self):
+        # Anything still buffered has to be on disk before a worker reads the file
+        self.file.flush()
+        self.file.seek(0)
+        return self
+
+    def iter_chunks(self):
+        return iter(lambda: self.file.read(CHUNK_SIZE), b"")
+
+    def close(self):
+        # The named file goes with it
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spool_upload(stream, content_length=None):
+    spool = UploadSpool(content_length)
+    try:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    return spool.finish()
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the tests away from the real caches, this has to happen before project is imported
+os.environ.setdefault("CACHE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="parser-tests-"), "cache.sqlite3"))
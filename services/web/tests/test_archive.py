@@ -0,0 +1,13 @@
+from project.archive import analyze_file
+
+
+def test_malware_and_pirated_lines_past_the_web_window(tmp_path):
+    lines = ["[12:00:00] [Server thread/INFO]: filler"] * 3000
+    lines[2500] = "\tat Updater.a(:12)"
+    lines[2600] = "[12:00:00] [Server thread/INFO]: [STDOUT] leaked build"
+    path = tmp_path / "latest.log"
+    path.write_text("\n".join(lines) + "\n")
+    record = analyze_file(str(path))
+    assert record["success"]
+    assert record["has_malware"] and record["malware_count"] == 1
+    assert record["has_pirated_plugins"]
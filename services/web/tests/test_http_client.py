@@ -0,0 +1,51 @@
+import time
+import threading
+import pytest
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from project.http_client import HttpClient, Deadline
+
+
+def serve(delay):
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(time.monotonic())
+            time.sleep(delay)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+
+def test_retries_stop_at_the_deadline():
+    server, hits = serve(1)
+    client = HttpClient(max_retries=2, backoff=0.1)
+    start = time.monotonic()
+    try:
+        with pytest.raises(requests.Timeout):
+            client.get(f"http://127.0.0.1:{server.server_port}/", deadline=Deadline(1.5))
+        # Before the shutdown, that waits on the server's poll interval
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+    assert elapsed < 2
+    assert len(hits) == 2
+
+
+def test_bad_status_is_retried_then_handed_back():
+    server, hits = serve(0)
+    client = HttpClient(max_retries=2, backoff=0.01)
+    try:
+        resp = client.get(f"http://127.0.0.1:{server.server_port}/")
+    finally:
+        server.shutdown()
+    assert resp.status_code == 503
+    assert len(hits) == 3
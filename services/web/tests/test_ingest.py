@@ -0,0 +1,26 @@
+import time
+from project.ingest import LineStream, iter_text_lines, CHUNK_SIZE
+
+
+def chunked(body, size=CHUNK_SIZE):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+def test_lines_split_like_splitlines_across_chunks():
+    text = "one\r\ntwo\rthree\n\nfour\x85five six\r"
+    for size in range(1, 8):
+        assert list(iter_text_lines(chunked(text.encode("utf-8"), size))) == text.splitlines()
+
+
+def test_long_line_without_newlines_is_capped_and_linear():
+    body = b"x" * (32 * 1024 * 1024)
+    start = time.perf_counter()
+    lines = list(LineStream(chunked(body), max_bytes=len(body)))
+    # Joining the line back up on every chunk took tens of seconds for this
+    assert time.perf_counter() - start < 5
+    assert lines == ["x" * 1024 * 1024]
+
+
+def test_line_after_a_long_one_is_kept():
+    body = b"y" * (3 * CHUNK_SIZE) + b"\nnext\n"
+    assert list(iter_text_lines(chunked(body), max_line_length=10)) == ["y" * 10, "next"]
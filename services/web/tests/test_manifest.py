@@ -0,0 +1,16 @@
+from project.manifest import ManifestService
+from project.parser import get_mc_from_data_version
+
+
+def test_data_versions_work_without_a_manifest_and_pick_up_its_dates():
+    service = ManifestService(path="/nonexistent/mc_manifest.json")
+    assert service.get_mc_version("3465") == "1.20.1"
+    assert service.data_versions[3465]["release_time"] is None
+    service.load({"versions": [{"id": "1.20.1", "type": "release", "releaseTime": "2023-06-12T13:25:51+00:00"}]})
+    assert service.get_mc_version(3465) == "1.20.1"
+    assert service.data_versions[3465]["release_time"].year == 2023
+    assert service.releases == ["1.20.1"]
+
+
+def test_unknown_data_version_is_shown_as_it_is():
+    assert get_mc_from_data_version("99999") == "99999"
@@ -0,0 +1,38 @@
+import threading
+from project.parser import LogFile, player_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code, username=None):
+        self.status_code = status_code
+        self.username = username
+
+    def json(self):
+        return {"data": {"player": {"username": self.username}}}
+
+
+def test_only_cache_misses_are_requested_and_the_cache_stays_on_our_thread(monkeypatch):
+    player_cache.set("cached-uuid", "Steve")
+    requested = []
+    cache_threads = set()
+    connect = player_cache.connect
+
+    def request_player_username(uuid, deadline=None):
+        requested.append(uuid)
+        return FakeResponse(200, "Alex") if uuid == "new-uuid" else FakeResponse(404)
+
+    def record_connect():
+        cache_threads.add(threading.get_ident())
+        return connect()
+
+    log_file = LogFile("test", use_result_store=False)
+    log_file.players = [{"username": "Steve", "uuid": "cached-uuid"}, {"username": "Alex", "uuid": "new-uuid"},
+                        {"username": "Herobrine", "uuid": "unknown-uuid"}]
+    monkeypatch.setattr(log_file, "request_player_username", request_player_username)
+    monkeypatch.setattr(player_cache, "connect", record_connect)
+    log_file.validate_players()
+    assert sorted(requested) == ["new-uuid", "unknown-uuid"]
+    assert cache_threads == {threading.get_ident()}
+    assert log_file.unverified_players == []
+    assert [player["username"] for player in log_file.invalid_players] == ["Herobrine"]
+    assert player_cache.get_many(["new-uuid", "unknown-uuid", "never-seen"]) == {"new-uuid": "Alex", "unknown-uuid": None}
@@ -0,0 +1,23 @@
+from project import result_store
+from project.parser import LogFile
+
+
+def test_partial_upload_result_isnt_reused():
+    content_hash = "partial-upload-result"
+    data = {"line_count": 1, "players": [{"username": "a", "uuid": "b"}], "unverified_players": [{"username": "a", "uuid": "b"}]}
+    result_store.put("", content_hash, data)
+    # The share link still finds it
+    assert result_store.get_by_hash(content_hash) == data
+    log_file = LogFile("https://mclo.gs/partial")
+    log_file.content_hash = content_hash
+    assert not log_file.load_from_store_by_hash()
+    assert result_store.get_by_url("https://mclo.gs/partial") is None
+
+
+def test_complete_result_is_reused():
+    content_hash = "complete-result"
+    result_store.put("", content_hash, {"line_count": 1, "players": [], "unverified_players": []})
+    log_file = LogFile("https://mclo.gs/complete")
+    log_file.content_hash = content_hash
+    assert log_file.load_from_store_by_hash()
+    assert result_store.get_by_url("https://mclo.gs/complete") is not None
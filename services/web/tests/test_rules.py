@@ -0,0 +1,47 @@
+from project.parser import LogFile
+from project.rules import Rule, RuleSet
+
+
+def scan(lines):
+    log_file = LogFile("test", use_result_store=False)
+    log_file.scan_lines(lines)
+    return log_file
+
+
+def test_leak_site_line_doesnt_hide_malware():
+    log_file = scan(["[12:00:00] [Server thread/INFO]: [STDOUT] leaked build, at Updater.a(:12)"])
+    assert log_file.malware_count == 1
+    assert log_file.has_pirated_plugins
+    assert {match["rule"] for match in log_file.rule_matches} == {"leak_site_stdout", "updater_backdoor"}
+
+
+def test_ignored_exception_on_a_leak_site_line_is_still_ignored():
+    log_file = scan(["[12:00:00] [Server thread/INFO]: [STDOUT] cracked org.bukkit.plugin.UnknownDependencyException: "
+                     "Unknown/missing dependency plugins: [Vault]. Please download and install these plugins to run 'Foo'."])
+    assert log_file.has_pirated_plugins
+    assert not log_file.has_exceptions
+
+
+def test_rule_outside_its_window_doesnt_hide_others():
+    log_file = LogFile("test", use_result_store=False)
+    log_file.rule_windows["pirated"] = 0
+    log_file.scan_lines(["[12:00:00] [Server thread/INFO]: [STDOUT] leaked build, at Updater.a(:12)"])
+    assert log_file.malware_count == 1
+    assert not log_file.has_pirated_plugins
+
+
+def test_line_counts_once_per_category():
+    log_file = scan(["[12:00:00] [Server thread/INFO]: [Foo] [Foo] [Loader] Leaked by Bob @ BlackSpigot.net [STDOUT]"])
+    assert len(log_file.potentially_pirated_lines) == 1
+
+
+def test_rules_are_picked_by_their_literals():
+    rules = RuleSet([
+        Rule.from_dict({"name": "no-literals", "category": "malware", "pattern": r"evil\.jar"}, "test"),
+        Rule.from_dict({"name": "leak site", "category": "pirated", "pattern": r"leak\w+", "literals_ignore_case": ["LEAK"]}, "test"),
+        Rule.from_dict({"name": "ignored", "category": "ignored_exception", "pattern": r"Boring", "literals": ["Boring"]}, "test"),
+    ])
+    assert [rule.name for rule, _ in rules.matches("Leaked evil.jar")] == ["no-literals"]
+    assert [(rule.name, matched) for rule, matched in rules.matches("leaked evil.jar")] == [("no-literals", "evil.jar"), ("leak site", "leaked")]
+    assert rules.first_match("leaked Boring", "ignored_exception").name == "ignored"
+    assert rules.first_match("leaked", "ignored_exception") is None
@@ -0,0 +1,59 @@
+import random
+from benchmarks.generator import LogSpec, generate_lines
+from project.parser import LogFile, analyze_shard
+from project.shards import find_shard_bounds, merge_shards, OFFLINE_LOOKAHEAD
+
+OFFLINE_LINE = "[00:00:00] [Server thread/WARN]: **** SERVER IS RUNNING IN OFFLINE/INSECURE MODE!"
+PROXY_LINES = ["[00:00:00] [Server thread/INFO]: Velocity forwarding", "[00:00:00] [Server thread/WARN]: use BungeeCord"]
+
+
+def single_pass(lines):
+    log_file = LogFile("test", use_result_store=False)
+    log_file.scan_lines(lines)
+    return log_file.to_dict()
+
+
+def sharded(lines, shard_lines):
+    # What scan_shards does, without the process pool
+    results = [analyze_shard("test", lines[start:end], start, lines[end:end + OFFLINE_LOOKAHEAD])
+               for start, end in find_shard_bounds(lines, shard_lines)]
+    log_file = LogFile("test", use_result_store=False)
+    merge_shards(log_file, results)
+    return log_file.to_dict()
+
+
+def make_log(seed):
+    rng = random.Random(seed)
+    lines = generate_lines(LogSpec(lines=2000, seed=seed, offline=rng.random() < 0.5))
+    # Offline windows and proxy lines dropped anywhere, so some of them straddle a shard boundary
+    for _ in range(rng.randint(0, 3)):
+        lines.insert(rng.randint(0, len(lines)), OFFLINE_LINE)
+    for _ in range(rng.randint(0, 3)):
+        start = rng.randint(0, len(lines) - 20)
+        lines.insert(start, OFFLINE_LINE)
+        lines.insert(start + rng.randint(1, 12), rng.choice(PROXY_LINES))
+    return lines
+
+
+def test_sharded_matches_single_pass():
+    for seed in range(30):
+        lines = make_log(seed)
+        expected = single_pass(lines)
+        for shard_lines in (7, 50, 300):
+            assert sharded(lines, shard_lines) == expected, (seed, shard_lines)
+
+
+def test_offline_window_across_a_boundary():
+    lines = ["[00:00:00] [Server thread/INFO]: filler"] * 40
+    # The window opens in the first shard and its proxy line is in the second, so it's not offline
+    lines[18] = OFFLINE_LINE
+    lines[22] = PROXY_LINES[0]
+    expected = single_pass(lines)
+    assert expected["using_proxy"] and not expected["is_offline"]
+    assert sharded(lines, 20) == expected
+    # Past the window the proxy line doesn't count
+    lines[22] = lines[0]
+    lines[30] = PROXY_LINES[0]
+    expected = single_pass(lines)
+    assert expected["is_offline"]
+    assert sharded(lines, 20) == expected
@@ -0,0 +1,26 @@
+from project.traces import TraceGrouper, is_trace_continuation
+
+
+def trace(thread, time):
+    prefix = f"[{time}] [Async Chat Thread - #{thread}/WARN]: "
+    return [
+        prefix + "java.lang.IllegalStateException: Asynchronous chat event!",
+        prefix + "\tat com.foo.Bar.baz(Bar.java:12)",
+        prefix + "    at com.foo.Bar.qux(Bar.java:40)",
+        prefix + "\t... 12 more",
+    ]
+
+
+def test_same_trace_from_different_threads_is_one_group():
+    grouper = TraceGrouper()
+    lines = trace(3, "12:00:01") + ["[12:00:02] [Server thread/INFO]: filler"] + trace(7, "12:00:05")
+    for index, line in enumerate(lines):
+        # The same as LogFile.scan_exception_line
+        if is_trace_continuation(line) and grouper.add_continuation(index, line):
+            continue
+        if "Exception" in line:
+            grouper.add_header(index, line)
+    groups = grouper.finish()
+    assert len(groups) == 1
+    assert groups[0]["count"] == 2
+    assert groups[0]["frames"] == ["com.foo.Bar.baz(Bar.java:12)", "com.foo.Bar.qux(Bar.java:40)"]
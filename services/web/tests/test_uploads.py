@@ -0,0 +1,26 @@
+import os
+from project import uploads
+from project.uploads import UploadSpool
+
+
+def test_rollover_keeps_the_body_and_closing_removes_it(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_BYTES", 10)
+    spool = UploadSpool()
+    spool.write(b"first\n")
+    assert spool.path is None
+    # Past the spool size it goes to disk on its own
+    spool.write(b"second line\n")
+    path = spool.finish().rollover()
+    with open(path, "rb") as f:
+        assert f.read() == b"first\nsecond line\n"
+    assert b"".join(spool.iter_chunks()) == b"first\nsecond line\n"
+    spool.close()
+    assert not os.path.exists(path)
+
+
+def test_small_upload_rolls_over_when_asked():
+    with UploadSpool() as spool:
+        spool.write(b"only line\n")
+        path = spool.finish().rollover()
+        with open(path, "rb") as f:
+            assert f.read() == b"only line\n"